@@ -5,21 +5,104 @@ Direct connection to OpenRouter API (no proxy required)
 Following Project Outline specifications
 """
 
+import argparse
 import subprocess
 import json
 import os
+import random
+import re
+import shlex
 import shutil
+import sys
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 
+from latency_stats import (
+    LatencyHistogram,
+    active_duration_s,
+    StreamingStats,
+    histograms_from_timings,
+    load_request_timings,
+    save_histograms,
+    served_by,
+    split_warmup,
+    decode_breakdown,
+)
+
 # Configuration
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
-if not OPENROUTER_API_KEY:
-    print("ERROR: OPENROUTER_API_KEY environment variable not set!")
-    print("Please set it with: export OPENROUTER_API_KEY='your-key-here'")
-    exit(1)
+OPENROUTER_URL = "https://openrouter.ai/api"
 
 DOCKER_IMAGE = "nvcr.io/nvidia/tritonserver:25.01-py3-sdk"  # Has genai-perf 0.0.10 with -H flag support
+DEFAULT_CONCURRENCY = 10
+DEFAULT_MEASUREMENT_INTERVAL_MS = 60000  # 60 second measurement window
+DEFAULT_INPUT_TOKENS = 50
+DEFAULT_WARMUP_REQUESTS = 10  # One cold request per concurrent slot at the default concurrency
+WARMUP_SPLIT_FILE = "warmup_split.json"
+
+# Decode-speed breakdown: per-request points kept for plotting decode rate against output length
+DECODE_BREAKDOWN_FILE = "decode_breakdown.json"
+MAX_DECODE_POINTS = 500
+
+# Soak runs: fold each measurement window into streaming stats, then drop it
+SOAK_WINDOW_S = 60
+LIVE_STATS_FILE = "live_stats.json"
+
+# Calibration: zero-latency endpoint in its own container, reached through the host like a real provider
+CALIBRATION_DIR = Path("results/calibration")
+CALIBRATION_FLOOR_FILE = CALIBRATION_DIR / "floor.json"
+CALIBRATION_PORT = 8999
+CALIBRATION_CONTAINER = "llm-benchmark-calibration"
+CALIBRATION_HOST = "host.docker.internal"
+CALIBRATION_MODEL = {
+    "name": "Zero-Latency Endpoint",
+    "id": "calibration/zero-latency",
+    "key": "calibration"
+}
+FLOOR_STATS = ['avg', 'min', 'max', 'p25', 'p50', 'p75', 'p90', 'p95', 'p99']
+
+# SLO search: find the highest load whose p99 TTFT / latency stay within the SLO
+SLO_PERCENTILE = 99
+SLO_PROBE_WINDOW_S = 30
+SLO_MAX_LOAD = 256
+SLO_MAX_ERROR_RATE = 0.01
+SLO_SEARCH_FILE = "slo_search.json"
+
+# Input-length sweep: one request at a time so TTFT reflects prefill, not queueing
+INPUT_SWEEP_CONCURRENCY = 1
+INPUT_SWEEP_WINDOW_S = 30
+INPUT_SWEEP_FILE = "input_sweep.json"
+
+# Prefix-caching workload: prompts sharing a long prefix, optionally as growing conversations
+PREFIX_CACHE_FILE = "prefix_cache.json"
+DEFAULT_PREFIX_TOKENS = 1024
+DEFAULT_SUFFIX_TOKENS = 50
+DEFAULT_CONVERSATIONS = 20
+# Common words that the gpt2 tokenizer (and most model tokenizers) count as one token each
+FILLER_WORDS = [
+    "the", "of", "and", "to", "in", "is", "that", "for", "it", "as", "was", "with", "be", "by",
+    "on", "not", "he", "this", "are", "or", "his", "from", "at", "which", "but", "have", "an",
+    "had", "they", "you", "were", "their", "one", "all", "we", "can", "her", "has", "there",
+    "been", "if", "more", "when", "will", "would", "who", "so", "no", "time", "new", "day", "work"
+]
+
+# Provider-pinned runs: one model benchmarked on each of several OpenRouter providers
+PROVIDERS_FILE = "providers.json"
+
+# Endpoint types GenAI-Perf can target; embeddings are sent in batches and never stream
+ENDPOINT_TYPES = ["chat", "completions", "embeddings"]
+# Statistics that only exist for generated text, left out of embeddings exports
+TOKEN_METRICS = ["time_to_first_token", "inter_token_latency", "output_sequence_length", "output_token_throughput"]
+BATCH_SWEEP_FILE = "batch_sweep.json"
+
+# Distributed runs: workers report mergeable histograms back on stdout
+WORKER_RESULT_MARKER = "WORKER_RESULT "
+REMOTE_WORKDIR = os.getenv("BENCHMARK_REMOTE_DIR", "Metrum_Poject")  # Checkout path on remote worker hosts
+
+# Results that survive clean_old_results() (the floor only changes when the harness does)
+PRESERVED_RESULTS = {CALIBRATION_DIR.name}
 
 ##TODO: do not hardcode models, create a CLI tool that allows you to run the benchmark while take the model as an argument
 # Models to benchmark - Fast, verified models
@@ -41,15 +124,39 @@ MODELS = [
     }
 ]
 
+# Benchmarked with --endpoint-type embeddings
+EMBEDDING_MODELS = [
+    {
+        "name": "Text Embedding 3 Small",
+        "id": "openai/text-embedding-3-small",
+        "key": "text-embedding-3-small"
+    }
+]
+
 
-def run_genai_perf_benchmark(model_info):
-    """Run GenAI-Perf benchmark for a single model using Docker - Direct OpenRouter connection"""
+def run_genai_perf_benchmark(model_info, output_dir=None, concurrency=DEFAULT_CONCURRENCY, calibration=False,
+                             measurement_interval_ms=DEFAULT_MEASUREMENT_INTERVAL_MS, request_rate=None,
+                             extra_inputs=None, input_tokens=DEFAULT_INPUT_TOKENS, input_file=None,
+                             output_tokens=None, ignore_eos=False, endpoint_type="chat", batch_size=1):
+    """Run GenAI-Perf benchmark for a single model using Docker - Direct OpenRouter connection
+
+    With calibration=True the same pipeline targets the zero-latency endpoint
+    started by start_calibration_server() instead of OpenRouter.
+    A request_rate (requests/sec) replaces the fixed concurrency when given.
+    extra_inputs are merged into every request body. An input_file (JSONL,
+    relative to the workspace) replaces the synthetic prompts.
+    output_tokens caps each response (max_tokens); with ignore_eos the
+    endpoint is also asked to generate exactly that many tokens, which only
+    some providers honour.
+    endpoint_type picks chat, completions or embeddings; embeddings requests
+    carry batch_size texts each and are not streamed.
+    """
     print(f"\n{'='*60}")
     print(f"Benchmarking: {model_info['name']} ({model_info['id']})")
     print(f"{'='*60}\n")
     
     # Create output directory
-    output_dir = Path(f"results/{model_info['key']}")
+    output_dir = Path(output_dir or f"results/{model_info['key']}")
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Determine workspace path for Docker-in-Docker
@@ -58,30 +165,60 @@ def run_genai_perf_benchmark(model_info):
     workspace_path = os.getenv('HOST_WORKSPACE_PATH', os.getcwd())
     print(f"Using workspace path: {workspace_path}")
     
-    # Build Docker command for GenAI-Perf
+    if calibration:
+        url = f"http://{CALIBRATION_HOST}:{CALIBRATION_PORT}"
+        headers = []
+    else:
+        url = OPENROUTER_URL  # Direct OpenRouter endpoint
+        headers = [
+            "-H", f"Authorization:Bearer {OPENROUTER_API_KEY}",  # Custom auth header 
+            "-H", "HTTP-Referer:http://localhost:8000",  # Optional: For OpenRouter rankings
+            "-H", "X-Title:GenAI-Perf-Benchmark",  # Optional: For OpenRouter rankings
+        ]
+    
+    request_inputs = dict(extra_inputs or {})
+    if endpoint_type != "embeddings":
+        # Usage data gives exact output token counts; without it they are estimated with the tokenizer
+        request_inputs.setdefault("usage", {"include": True})
+    if output_tokens and ignore_eos:
+        request_inputs.update({"ignore_eos": True, "min_tokens": output_tokens})
+    
+    # Build GenAI-Perf command
     # Using newer Triton image (25.01) with genai-perf 0.0.10 that has -H flag support
     # Directly connecting to OpenRouter using custom headers 
-    cmd = [
-        "docker", "run", "--rm",
-        "-v", f"{workspace_path}:/workspace",
-        "-w", "/workspace",
-        DOCKER_IMAGE,
+    genai_perf_cmd = [
         "genai-perf", "profile",
         "-m", model_info['id'],
         "--service-kind", "openai",  # Using OpenAI-compatible API
-        "--endpoint-type", "chat",
-        "-u", "https://openrouter.ai/api",  # Direct OpenRouter endpoint
-        "-H", f"Authorization:Bearer {OPENROUTER_API_KEY}",  # Custom auth header 
-        "-H", "HTTP-Referer:http://localhost:8000",  # Optional: For OpenRouter rankings
-        "-H", "X-Title:GenAI-Perf-Benchmark",  # Optional: For OpenRouter rankings
-        "--synthetic-input-tokens-mean", "50",  # Generate synthetic prompts
-        "--num-dataset-entries", "10",  # Number of test prompts
+        "--endpoint-type", endpoint_type,
+        # Streaming is required for TTFT and inter-token latency; embeddings have neither
+        *(["--batch-size-text", str(batch_size)] if endpoint_type == "embeddings" else ["--streaming"]),
+        "-u", url,
+        *headers,
+        *(["--input-file", f"/workspace/{input_file}"] if input_file else [
+            "--synthetic-input-tokens-mean", str(input_tokens),  # Generate synthetic prompts
+            "--synthetic-input-tokens-stddev", "0",  # Every prompt the same length
+            "--num-dataset-entries", "10",  # Number of test prompts
+        ]),
         "--tokenizer", "gpt2",
-        "--measurement-interval", "60000",  # 60 second measurement window (in ms)
-        "--concurrency", "10",  # 10 concurrent requests
+        "--measurement-interval", str(measurement_interval_ms),  # Measurement window (in ms)
+        # Concurrent requests, or an open-loop request rate
+        *(["--request-rate", str(request_rate)] if request_rate else ["--concurrency", str(concurrency)]),
+        *(["--output-tokens-mean", str(output_tokens), "--output-tokens-stddev", "0"] if output_tokens else []),
+        *(["--extra-inputs", json.dumps(request_inputs)] if request_inputs else []),
         "--artifact-dir", f"/workspace/{output_dir}"
     ]
     
+    cmd = [
+        "docker", "run", "--rm",
+        "-v", f"{workspace_path}:/workspace",
+        "-w", "/workspace",
+        # Leave the client container through the Docker bridge and NAT, as requests to OpenRouter do
+        *(["--add-host", f"{CALIBRATION_HOST}:host-gateway"] if calibration else []),
+        DOCKER_IMAGE,
+        *genai_perf_cmd
+    ]
+    
     try:
         # Run GenAI-Perf with simplified output
         print(f"Benchmarking {model_info['name']}...")
@@ -163,6 +300,13 @@ def parse_genai_perf_results(output_dir):
     if csv_files:
         results["csv_file"] = str(csv_files[0])
     
+    # Record request/error counts and which upstream provider OpenRouter routed requests to
+    if profile_file.exists():
+        timings = load_request_timings(profile_file)
+        results["request_count"] = sum(1 for t in timings if not t["error"])
+        results["error_count"] = sum(1 for t in timings if t["error"])
+        results["served_by"] = served_by(timings)
+    
     # Parse log file for metrics
     log_file = output_dir / "genai_perf.log"
     if log_file.exists():
@@ -173,6 +317,1006 @@ def parse_genai_perf_results(output_dir):
     return results
 
 
+def separate_warmup(output_dir, warmup_requests, endpoint_type="chat"):
+    """Report a run's first requests as cold start and keep them out of the steady-state exports
+
+    GenAI-Perf's own exports are kept as profile_export_genai_perf_all.*,
+    and the steady-state statistics replace profile_export_genai_perf.* so
+    the dashboard, summary and /metrics all show them.
+    """
+    output_dir = Path(output_dir)
+    timings = load_request_timings(output_dir / "profile_export.json")
+    cold, steady = split_warmup(timings, warmup_requests)
+    if not cold or all(t["error"] for t in steady):
+        print(f"Not enough requests to separate {warmup_requests} warm-up requests; keeping blended statistics")
+        return None
+    
+    for suffix in ("csv", "json"):
+        export = output_dir / f"profile_export_genai_perf.{suffix}"
+        if export.exists():
+            export.replace(output_dir / f"profile_export_genai_perf_all.{suffix}")
+    steady_stats = StreamingStats()
+    steady_stats.add_timings(steady)
+    write_genai_perf_exports(output_dir, steady_stats.as_merged(), endpoint_type)
+    cold_stats = StreamingStats()
+    cold_stats.add_timings(cold)
+    return save_warmup_split(output_dir, warmup_requests, cold_stats.as_merged(), steady_stats.as_merged(),
+                             endpoint_type)
+
+
+def save_warmup_split(output_dir, warmup_requests, cold, steady, endpoint_type="chat"):
+    """Write cold-start statistics and steady-state counts to warmup_split.json
+
+    cold and steady are merged statistics (histograms and request/error
+    counts), so single, distributed and soak runs all report the same way.
+    """
+    cold_start = {
+        "request_latency": cold["histograms"]["request_latency"].summary(),
+        "request_count": cold["request_count"],
+        "error_count": cold["error_count"]
+    }
+    if endpoint_type != "embeddings":
+        cold_start["time_to_first_token"] = cold["histograms"]["time_to_first_token"].summary()
+    split = {
+        "warmup_requests": warmup_requests,
+        "cold_start": cold_start,
+        "steady_state": {
+            "request_count": steady["request_count"],
+            "error_count": steady["error_count"]
+        }
+    }
+    with open(Path(output_dir) / WARMUP_SPLIT_FILE, 'w') as f:
+        json.dump(split, f, indent=2)
+    
+    metric, label = ("request_latency", "latency") if endpoint_type == "embeddings" else ("time_to_first_token", "TTFT")
+    cold_avg = cold_start[metric].get("avg", 0)
+    steady_avg = steady["histograms"][metric].mean() or 0
+    print(f"Cold-start avg {label} {cold_avg:.2f} ms vs steady-state {steady_avg:.2f} ms "
+          f"({warmup_requests} warm-up requests)")
+    return split
+
+
+def without_usage(timings):
+    """Completed requests left out of the decode breakdown because usage reported no token count"""
+    return sum(1 for t in timings if not t["error"] and t["output_tokens_source"] != "usage")
+
+
+def summarize_decode_points(points):
+    """Prefill and decode statistics over per-request decode points"""
+    histograms = {
+        "time_to_first_token": LatencyHistogram(),
+        "inter_token_latency": LatencyHistogram(),
+        "decode_tokens_per_s": LatencyHistogram(),
+        "output_tokens": LatencyHistogram()
+    }
+    for point in points:
+        histograms["time_to_first_token"].record(point["ttft_ms"])
+        histograms["inter_token_latency"].record(point["itl_ms"])
+        histograms["decode_tokens_per_s"].record(point["decode_tokens_per_s"])
+        histograms["output_tokens"].record(point["output_tokens"])
+    return {
+        "request_count": len(points),
+        "prefill": {"time_to_first_token": histograms["time_to_first_token"].summary()},
+        "decode": {
+            "inter_token_latency": histograms["inter_token_latency"].summary(),
+            "tokens_per_s": histograms["decode_tokens_per_s"].summary()
+        },
+        "output_tokens": histograms["output_tokens"].summary()
+    }
+
+
+def sample_points(points, limit=MAX_DECODE_POINTS):
+    """Evenly thin out points so the saved file stays small"""
+    if len(points) <= limit:
+        return points
+    stride = len(points) / limit
+    return [points[int(i * stride)] for i in range(limit)]
+
+
+def write_decode_breakdown(output_dir, warmup_requests=0, output_tokens=None, ignore_eos=False):
+    """Save per-request decode speed, separate from prefill, for a finished run"""
+    timings = load_request_timings(Path(output_dir) / "profile_export.json")
+    _, steady = split_warmup(timings, warmup_requests)
+    points = decode_breakdown(steady)
+    breakdown = {
+        "timestamp": datetime.now().isoformat(),
+        "target_output_tokens": output_tokens,
+        "ignore_eos": ignore_eos,
+        **summarize_decode_points(points),
+        "requests_without_usage": without_usage(steady),
+        "points": [[p["output_tokens"], p["decode_tokens_per_s"]] for p in sample_points(points)]
+    }
+    with open(Path(output_dir) / DECODE_BREAKDOWN_FILE, 'w') as f:
+        json.dump(breakdown, f, indent=2)
+    return breakdown
+
+
+def run_output_sweep(model_info, output_lengths, concurrency=DEFAULT_CONCURRENCY, ignore_eos=False,
+                     warmup_requests=0, **options):
+    """Benchmark each target output length and relate decode speed to output length"""
+    print(f"\n{'='*60}")
+    print(f"Output-length sweep: {model_info['name']} over {', '.join(map(str, output_lengths))} tokens")
+    print(f"{'='*60}\n")
+    
+    sweep_dir = Path(f"results/{model_info['key']}/output_sweep")
+    if sweep_dir.exists():
+        shutil.rmtree(sweep_dir)
+    
+    all_points = []
+    lengths = []
+    for target in sorted(output_lengths):
+        output_dir = run_genai_perf_benchmark(model_info, sweep_dir / f"out_{target}", concurrency,
+                                              output_tokens=target, ignore_eos=ignore_eos, **options)
+        if not output_dir:
+            print(f"Skipping {target} output tokens: GenAI-Perf failed")
+            continue
+        _, timings = split_warmup(load_request_timings(output_dir / "profile_export.json"), warmup_requests)
+        points = decode_breakdown(timings)
+        all_points += points
+        lengths.append({"target_output_tokens": target, **summarize_decode_points(points),
+                        "requests_without_usage": without_usage(timings)})
+        if not points:
+            print(f"No decode points for {target} output tokens: the provider reported no usage token counts")
+            continue
+        
+        decode_tps = lengths[-1]["decode"]["tokens_per_s"].get("p50", 0)
+        actual = lengths[-1]["output_tokens"].get("avg", 0)
+        print(f"{target} tokens requested, {actual:.0f} generated on average: p50 decode {decode_tps:.1f} tokens/s")
+    
+    breakdown = {
+        "timestamp": datetime.now().isoformat(),
+        "target_output_tokens": sorted(output_lengths),
+        "ignore_eos": ignore_eos,
+        "warmup_requests": warmup_requests,
+        **summarize_decode_points(all_points),
+        "requests_without_usage": sum(length["requests_without_usage"] for length in lengths),
+        "lengths": lengths,
+        "points": [[p["output_tokens"], p["decode_tokens_per_s"]] for p in sample_points(all_points)]
+    }
+    with open(Path(f"results/{model_info['key']}") / DECODE_BREAKDOWN_FILE, 'w') as f:
+        json.dump(breakdown, f, indent=2)
+    return breakdown
+
+
+def load_genai_perf_stats(output_dir):
+    """Load the aggregated statistics GenAI-Perf exports for a run"""
+    stats_file = Path(output_dir) / "profile_export_genai_perf.json"
+    if not stats_file.exists():
+        return {}
+    with open(stats_file, 'r') as f:
+        return json.load(f)
+
+
+def embedding_throughput(output_dir, batch_size):
+    """Items embedded per second and latency per batch for an embeddings run"""
+    stats = load_genai_perf_stats(output_dir)
+    request_throughput = stats.get("request_throughput", {}).get("avg", 0)
+    latency = {k: v for k, v in stats.get("request_latency", {}).items() if k != "unit"}
+    return {
+        "batch_size": batch_size,
+        "request_throughput": request_throughput,
+        "items_per_s": request_throughput * batch_size,
+        "request_latency": latency,
+        "ms_per_item": latency["avg"] / batch_size if latency.get("avg") else None
+    }
+
+
+def run_batch_sweep(model_info, batch_sizes, concurrency=DEFAULT_CONCURRENCY, **options):
+    """Benchmark an embeddings model at several batch sizes and record items/s per size"""
+    print(f"\n{'='*60}")
+    print(f"Batch-size sweep: {model_info['name']} over {', '.join(map(str, batch_sizes))} texts per request")
+    print(f"{'='*60}\n")
+    
+    sweep_dir = Path(f"results/{model_info['key']}/batch_sweep")
+    if sweep_dir.exists():
+        shutil.rmtree(sweep_dir)
+    
+    points = []
+    for batch_size in sorted(batch_sizes):
+        output_dir = run_genai_perf_benchmark(model_info, sweep_dir / f"batch_{batch_size}", concurrency,
+                                              **{**options, "batch_size": batch_size})
+        if not output_dir:
+            print(f"Skipping batch size {batch_size}: GenAI-Perf failed")
+            continue
+        point = embedding_throughput(output_dir, batch_size)
+        points.append(point)
+        print(f"Batch size {batch_size}: {point['items_per_s']:.1f} items/s, "
+              f"p50 latency {point['request_latency'].get('p50', 0):.2f} ms")
+    
+    best = max(points, key=lambda p: p["items_per_s"], default=None)
+    sweep = {
+        "timestamp": datetime.now().isoformat(),
+        "concurrency": concurrency,
+        "input_tokens": options.get("input_tokens", DEFAULT_INPUT_TOKENS),
+        "points": points,
+        "best_batch_size": best["batch_size"] if best else None,
+        "peak_items_per_s": best["items_per_s"] if best else None
+    }
+    with open(Path(f"results/{model_info['key']}") / BATCH_SWEEP_FILE, 'w') as f:
+        json.dump(sweep, f, indent=2)
+    
+    if best:
+        print(f"\n{model_info['name']}: peak {best['items_per_s']:.1f} items/s at batch size {best['batch_size']}")
+    return sweep
+
+
+def steady_state_counts(output_dir, results):
+    """Completed and failed requests behind a run's reported statistics
+
+    Uses the warm-up split when one was made, then the counts written with
+    merged (distributed or soak) exports, and otherwise every request.
+    """
+    split_file = Path(output_dir) / WARMUP_SPLIT_FILE
+    if split_file.exists():
+        with open(split_file, 'r') as f:
+            steady = json.load(f)["steady_state"]
+        return steady["request_count"], steady["error_count"]
+    stats = load_genai_perf_stats(output_dir)
+    if "request_count" in stats and "error_count" in stats:
+        return stats["request_count"]["avg"], stats["error_count"]["avg"]
+    return results.get("request_count"), results.get("error_count")
+
+
+def save_run_config(output_dir, **settings):
+    """Record the load settings (and outcome counts) of a run so reports can match them later"""
+    config = {"timestamp": datetime.now().isoformat(), **settings}
+    with open(Path(output_dir) / "run_config.json", 'w') as f:
+        json.dump(config, f, indent=2)
+
+
+def get_model(model_key):
+    """Look up a configured model by its results key"""
+    for model in MODELS + EMBEDDING_MODELS:
+        if model['key'] == model_key:
+            return model
+    raise ValueError(f"Unknown model key: {model_key}")
+
+
+def summarize_worker_run(output_dir, warmup_requests=0):
+    """Reduce a worker's per-request export to mergeable histograms and counters
+
+    Each worker opens its own connections, so its first warmup_requests
+    are left out of the steady-state statistics and reported as "cold".
+    """
+    cold, timings = split_warmup(load_request_timings(Path(output_dir) / "profile_export.json"), warmup_requests)
+    histograms = histograms_from_timings(timings)
+    save_histograms(histograms, Path(output_dir) / "histograms.json")
+    return {**summarize_timings(timings, histograms), "cold": summarize_timings(cold)}
+
+
+def summarize_timings(timings, histograms=None):
+    """Mergeable histograms and counters for one worker's share of requests"""
+    completed = [t for t in timings if not t["error"]]
+    histograms = histograms or histograms_from_timings(timings)
+    return {
+        "histograms": {name: h.to_dict() for name, h in histograms.items()},
+        "request_count": len(completed),
+        "error_count": len(timings) - len(completed),
+        "output_tokens": sum(t["output_tokens"] or 0 for t in completed),
+        "duration_s": active_duration_s(timings)
+    }
+
+
+def run_worker(model_info, concurrency, output_dir, warmup_requests=0, **options):
+    """Worker side of a distributed run: benchmark one share of the load and report histograms"""
+    if not run_genai_perf_benchmark(model_info, output_dir, concurrency, **options):
+        exit(1)
+    result = summarize_worker_run(output_dir, warmup_requests)
+    print(WORKER_RESULT_MARKER + json.dumps(result))
+
+
+def split_concurrency(concurrency, num_workers):
+    """Spread the total concurrency as evenly as possible over the workers"""
+    return [concurrency // num_workers + (1 if i < concurrency % num_workers else 0) for i in range(num_workers)]
+
+
+def worker_command(host, model_info, concurrency, output_dir, warmup_requests, options):
+    """Command that runs a worker locally or, over ssh, on a remote host"""
+    args = [
+        "benchmark.py", "--worker",
+        "--model", model_info['key'],
+        "--concurrency", str(concurrency),
+        "--output-dir", str(output_dir),
+        "--warmup-requests", str(warmup_requests),
+        *run_options_to_argv(options)
+    ]
+    if host == "local":
+        return [sys.executable, "-u", *args]
+    return ["ssh", host, f"cd {shlex.quote(REMOTE_WORKDIR)} && python3 -u {shlex.join(args)}"]
+
+
+def merge_worker_results(worker_results):
+    """Merge worker histograms and add up throughput (workers run side by side)"""
+    histograms = {}
+    for result in worker_results:
+        for name, data in result["histograms"].items():
+            histogram = LatencyHistogram.from_dict(data)
+            histograms[name] = histograms[name].merge(histogram) if name in histograms else histogram
+    
+    request_throughput = sum(r["request_count"] / r["duration_s"] for r in worker_results if r["duration_s"])
+    token_throughput = sum(r["output_tokens"] / r["duration_s"] for r in worker_results if r["duration_s"])
+    token_counted = "output_sequence_length" in histograms and histograms["output_sequence_length"].count
+    return {
+        "histograms": histograms,
+        "request_throughput": request_throughput,
+        "output_token_throughput": token_throughput if token_counted else None,
+        "request_count": sum(r["request_count"] for r in worker_results),
+        "error_count": sum(r["error_count"] for r in worker_results)
+    }
+
+
+def write_genai_perf_exports(output_dir, merged, endpoint_type="chat"):
+    """Write merged statistics in GenAI-Perf's JSON and CSV export layout
+
+    Embeddings runs have no tokens to time, so TOKEN_METRICS are left out.
+    """
+    skipped = TOKEN_METRICS if endpoint_type == "embeddings" else []
+    units = {
+        "time_to_first_token": "ms",
+        "inter_token_latency": "ms",
+        "request_latency": "ms",
+        "output_sequence_length": "tokens"
+    }
+    csv_names = {
+        "time_to_first_token": "Time To First Token (ms)",
+        "inter_token_latency": "Inter Token Latency (ms)",
+        "request_latency": "Request Latency (ms)",
+        "output_sequence_length": "Output Sequence Length"
+    }
+    
+    export = {}
+    for name, unit in units.items():
+        if name not in skipped and name in merged["histograms"] and merged["histograms"][name].count:
+            export[name] = {"unit": unit, **merged["histograms"][name].summary()}
+    export["request_throughput"] = {"unit": "requests/sec", "avg": merged["request_throughput"]}
+    if "output_token_throughput" not in skipped and merged["output_token_throughput"] is not None:
+        export["output_token_throughput"] = {"unit": "tokens/sec", "avg": merged["output_token_throughput"]}
+    export["request_count"] = {"unit": "count", "avg": merged["request_count"]}
+    export["error_count"] = {"unit": "count", "avg": merged["error_count"]}
+    
+    with open(Path(output_dir) / "profile_export_genai_perf.json", 'w') as f:
+        json.dump(export, f, indent=2)
+    
+    stat_columns = ['avg', 'min', 'max', 'p99', 'p95', 'p90', 'p75', 'p50', 'p25']
+    lines = ["Metric," + ",".join(stat_columns)]
+    for name, csv_name in csv_names.items():
+        if name in export:
+            values = ",".join(f'"{export[name][stat]:,.2f}"' for stat in stat_columns)
+            lines.append(f"{csv_name},{values}")
+    lines += ["", "Metric,Value"]
+    if "output_token_throughput" in export:
+        lines.append(f'Output Token Throughput (per sec),"{merged["output_token_throughput"]:,.2f}"')
+    lines += [
+        f'Request Throughput (per sec),"{merged["request_throughput"]:,.2f}"',
+        f'Request Count,"{merged["request_count"]}"',
+        f'Error Count,"{merged["error_count"]}"'
+    ]
+    with open(Path(output_dir) / "profile_export_genai_perf.csv", 'w') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def run_distributed_benchmark(model_info, concurrency, hosts, warmup_requests=0, **options):
+    """Coordinator side of a distributed run: fan the load out to workers and merge their histograms"""
+    print(f"\n{'='*60}")
+    print(f"Distributed benchmark: {model_info['name']} ({model_info['id']})")
+    print(f"{'='*60}\n")
+    
+    output_dir = Path(f"results/{model_info['key']}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    shares = split_concurrency(concurrency, len(hosts))
+    worker_results = [None] * len(hosts)
+    
+    def collect(index, process):
+        # Relay worker progress and pick up its final histogram line
+        for line in process.stdout:
+            line = line.rstrip()
+            if line.startswith(WORKER_RESULT_MARKER):
+                worker_results[index] = json.loads(line[len(WORKER_RESULT_MARKER):])
+            elif line:
+                print(f"[worker {index}] {line}")
+        process.wait()
+    
+    threads = []
+    for index, (host, share) in enumerate(zip(hosts, shares)):
+        if share == 0:
+            continue
+        worker_dir = output_dir / "workers" / f"w{index}"
+        print(f"Starting worker {index} on {host} with concurrency {share}")
+        process = subprocess.Popen(
+            worker_command(host, model_info, share, worker_dir, warmup_requests, options),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1
+        )
+        thread = threading.Thread(target=collect, args=(index, process))
+        thread.start()
+        threads.append(thread)
+    
+    for thread in threads:
+        thread.join()
+    
+    completed = [r for r in worker_results if r]
+    if not completed:
+        print(f"\nAll workers failed for {model_info['name']}")
+        return None
+    if len(completed) < len(threads):
+        print(f"Warning: only {len(completed)} of {len(threads)} workers reported results")
+    
+    merged = merge_worker_results(completed)
+    write_genai_perf_exports(output_dir, merged, options.get("endpoint_type", "chat"))
+    if warmup_requests:
+        cold = merge_worker_results([r["cold"] for r in completed])
+        if cold["request_count"]:
+            save_warmup_split(output_dir, warmup_requests, cold, merged, options.get("endpoint_type", "chat"))
+    
+    print(f"\nMerged {merged['request_count']} requests from {len(completed)} workers for {model_info['name']}")
+    return output_dir
+
+
+def write_live_snapshot(output_dir, snapshot):
+    """Atomically replace a model's live statistics so readers never see a partial file"""
+    live_path = Path(output_dir) / LIVE_STATS_FILE
+    tmp_path = live_path.with_suffix(".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f, indent=2)
+    os.replace(tmp_path, live_path)
+
+
+def soak_snapshot(stats, model_info, concurrency, window_s, endpoint_type, final):
+    """Live statistics for a soak run, without token metrics for embeddings
+
+    window_s tells readers how often a new snapshot is due, so a snapshot
+    left behind by a killed run can be told apart from a live one.
+    """
+    snapshot = stats.snapshot(model=model_info['key'], concurrency=concurrency, window_s=window_s, final=final)
+    if endpoint_type == "embeddings":
+        for name in TOKEN_METRICS:
+            snapshot.pop(name, None)
+    return snapshot
+
+
+def run_soak_benchmark(model_info, concurrency, duration_s, window_s=SOAK_WINDOW_S, warmup_requests=0, **options):
+    """Benchmark for a long period in back-to-back windows with bounded memory and disk
+
+    Each window's per-request export, minus its first warmup_requests, is
+    folded into streaming histograms and deleted; a live snapshot is
+    published after every window. The warm-up requests of all windows are
+    folded into separate cold-start histograms.
+    """
+    print(f"\n{'='*60}")
+    print(f"Soak test: {model_info['name']} for {duration_s / 60:.0f} minutes")
+    print(f"{'='*60}\n")
+    
+    output_dir = Path(f"results/{model_info['key']}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    window_dir = output_dir / "soak_window"
+    endpoint_type = options.get("endpoint_type", "chat")
+    
+    stats = StreamingStats()
+    cold_stats = StreamingStats()
+    deadline = time.monotonic() + duration_s
+    while time.monotonic() < deadline:
+        if window_dir.exists():
+            shutil.rmtree(window_dir)
+        if not run_genai_perf_benchmark(model_info, window_dir, concurrency,
+                                        measurement_interval_ms=window_s * 1000, **options):
+            print(f"Soak window failed for {model_info['name']}, stopping early")
+            break
+        
+        # Every window is a fresh GenAI-Perf container with new connections, so each starts cold
+        cold, timings = split_warmup(load_request_timings(window_dir / "profile_export.json"), warmup_requests)
+        stats.add_timings(timings)
+        cold_stats.add_timings(cold)
+        snapshot = soak_snapshot(stats, model_info, concurrency, window_s, endpoint_type, final=False)
+        write_live_snapshot(output_dir, snapshot)
+        
+        ttft_p99 = snapshot.get('time_to_first_token', {}).get('p99')
+        latency_p99 = snapshot['request_latency'].get('p99', 0)
+        print(f"Window {stats.windows}: {stats.request_count} requests, "
+              f"{f'p99 TTFT {ttft_p99:.2f} ms, ' if ttft_p99 is not None else ''}p99 latency {latency_p99:.2f} ms")
+    
+    shutil.rmtree(window_dir, ignore_errors=True)
+    if not stats.request_count:
+        return None
+    
+    write_genai_perf_exports(output_dir, stats.as_merged(), endpoint_type)
+    if cold_stats.request_count:
+        save_warmup_split(output_dir, warmup_requests, cold_stats.as_merged(), stats.as_merged(), endpoint_type)
+    write_live_snapshot(output_dir, soak_snapshot(stats, model_info, concurrency, window_s, endpoint_type, final=True))
+    print(f"\nSoak test completed for {model_info['name']}: {stats.request_count} requests")
+    return output_dir
+
+
+def evaluate_slo_probe(output_dir, ttft_slo_ms, latency_slo_ms, warmup_requests=0):
+    """Check one probe's p99 TTFT / latency against the SLO and compute its goodput
+
+    Goodput is the share of all sent requests that completed within both
+    SLO limits; failed requests count against it. The probe's first
+    warmup_requests are left out, as in a normal run.
+    """
+    _, timings = split_warmup(load_request_timings(Path(output_dir) / "profile_export.json"), warmup_requests)
+    completed = [t for t in timings if not t["error"]]
+    histograms = histograms_from_timings(timings)
+    
+    within_slo = [
+        t for t in completed
+        if (ttft_slo_ms is None or t["ttft_ms"] <= ttft_slo_ms)
+        and (latency_slo_ms is None or t["latency_ms"] <= latency_slo_ms)
+    ]
+    duration_s = active_duration_s(timings)
+    
+    ttft_p99 = histograms["time_to_first_token"].percentile(SLO_PERCENTILE)
+    latency_p99 = histograms["request_latency"].percentile(SLO_PERCENTILE)
+    error_rate = (len(timings) - len(completed)) / len(timings) if timings else 1.0
+    passed = (
+        bool(completed)
+        and error_rate <= SLO_MAX_ERROR_RATE
+        and (ttft_slo_ms is None or ttft_p99 <= ttft_slo_ms)
+        and (latency_slo_ms is None or latency_p99 <= latency_slo_ms)
+    )
+    return {
+        "passed": passed,
+        "ttft_p99_ms": ttft_p99,
+        "latency_p99_ms": latency_p99,
+        "goodput": len(within_slo) / len(timings) if timings else 0,
+        "request_throughput": len(completed) / duration_s if duration_s else 0,
+        "request_count": len(completed),
+        "error_count": len(timings) - len(completed)
+    }
+
+
+def run_slo_search(model_info, ttft_slo_ms, latency_slo_ms, axis="concurrency",
+                   max_load=SLO_MAX_LOAD, window_s=SLO_PROBE_WINDOW_S, warmup_requests=0, **options):
+    """Find the highest load a model sustains within the p99 TTFT / latency SLO
+
+    Load is doubled from 1 until a probe misses the SLO (or max_load is
+    reached), then binary search narrows the boundary between the last
+    passing and the first failing load. This assumes latency grows with load.
+    """
+    print(f"\n{'='*60}")
+    print(f"SLO search: {model_info['name']} (p{SLO_PERCENTILE} TTFT <= {ttft_slo_ms} ms, "
+          f"p{SLO_PERCENTILE} latency <= {latency_slo_ms} ms)")
+    print(f"{'='*60}\n")
+    
+    search_dir = Path(f"results/{model_info['key']}/slo_search")
+    if search_dir.exists():
+        shutil.rmtree(search_dir)
+    search_dir.mkdir(parents=True)
+    
+    probes = {}
+    
+    def probe(load):
+        if load not in probes:
+            load_args = {"request_rate": load} if axis == "request-rate" else {"concurrency": load}
+            output_dir = run_genai_perf_benchmark(model_info, search_dir / f"load_{load}",
+                                                  measurement_interval_ms=window_s * 1000, **load_args, **options)
+            if output_dir:
+                result = evaluate_slo_probe(output_dir, ttft_slo_ms, latency_slo_ms, warmup_requests)
+            else:
+                result = {"passed": False, "goodput": 0, "error": "GenAI-Perf failed"}
+            probes[load] = {"load": load, **result}
+            print(f"Probe {axis}={load}: {'PASS' if result['passed'] else 'FAIL'}, "
+                  f"goodput {result['goodput']:.1%}")
+        return probes[load]["passed"]
+    
+    # Exponential phase: find a failing load
+    passed_load, failed_load = 0, None
+    load = 1
+    while True:
+        if not probe(load):
+            failed_load = load
+            break
+        passed_load = load
+        if load >= max_load:
+            break
+        load = min(load * 2, max_load)
+    
+    # Binary phase: narrow the boundary
+    if failed_load is not None:
+        low, high = passed_load, failed_load
+        while high - low > 1:
+            middle = (low + high) // 2
+            if probe(middle):
+                low = middle
+            else:
+                high = middle
+        passed_load = low
+    
+    best = probes.get(passed_load, {})
+    search = {
+        "timestamp": datetime.now().isoformat(),
+        "axis": axis,
+        "slo": {"percentile": SLO_PERCENTILE, "ttft_ms": ttft_slo_ms, "latency_ms": latency_slo_ms},
+        "warmup_requests": warmup_requests,
+        "run_options": options,
+        "max_sustainable_load": passed_load,
+        "max_load_reached": failed_load is None,
+        "goodput_at_max": best.get("goodput"),
+        "request_throughput_at_max": best.get("request_throughput"),
+        "probes": [probes[load] for load in sorted(probes)]
+    }
+    with open(Path(f"results/{model_info['key']}") / SLO_SEARCH_FILE, 'w') as f:
+        json.dump(search, f, indent=2)
+    
+    print(f"\nMax sustainable {axis} for {model_info['name']}: {passed_load}"
+          f"{' (search ceiling reached)' if failed_load is None else ''}")
+    return search
+
+
+def provider_slug(provider):
+    """Directory-safe name for an OpenRouter provider (e.g. 'Together' -> 'together')"""
+    return re.sub(r'[^a-z0-9]+', '-', provider.lower()).strip('-')
+
+
+def summarize_provider_run(output_dir, provider, warmup_requests=0):
+    """Latency, throughput and actual serving provider for one pinned run, after warm-up"""
+    _, timings = split_warmup(load_request_timings(Path(output_dir) / "profile_export.json"), warmup_requests)
+    completed = [t for t in timings if not t["error"]]
+    histograms = histograms_from_timings(timings)
+    duration_s = active_duration_s(timings)
+    
+    providers_seen = served_by(timings)
+    return {
+        "provider": provider,
+        "served_by": providers_seen,
+        # Fallbacks are disabled, so anything else is a surprise; OpenRouter accepts slugs or display names
+        "pinned": {provider_slug(p) for p in providers_seen} <= {provider_slug(provider)},
+        "time_to_first_token": histograms["time_to_first_token"].summary(),
+        "request_latency": histograms["request_latency"].summary(),
+        "request_throughput": len(completed) / duration_s if duration_s else 0,
+        "output_token_throughput": (sum(t["output_tokens"] or 0 for t in completed) / duration_s if duration_s else 0)
+        if histograms["output_sequence_length"].count else None,
+        "request_count": len(completed),
+        "error_count": len(timings) - len(completed)
+    }
+
+
+def run_provider_comparison(model_info, providers, concurrency=DEFAULT_CONCURRENCY, warmup_requests=0, **options):
+    """Benchmark one model pinned to each OpenRouter provider, all providers in parallel
+
+    options are the same run options as a normal run, so the providers are
+    measured with the main run's prompt and output lengths.
+    """
+    print(f"\n{'='*60}")
+    print(f"Provider comparison: {model_info['name']} on {', '.join(providers)}")
+    print(f"{'='*60}\n")
+    
+    providers_dir = Path(f"results/{model_info['key']}/providers")
+    if providers_dir.exists():
+        shutil.rmtree(providers_dir)
+    
+    output_dirs = {}
+    
+    def run_pinned(provider):
+        # No fallbacks: a request the provider cannot serve fails instead of being rerouted
+        routing = {"provider": {"order": [provider], "allow_fallbacks": False}}
+        output_dirs[provider] = run_genai_perf_benchmark(
+            model_info, providers_dir / provider_slug(provider), concurrency, extra_inputs=routing, **options
+        )
+    
+    threads = [threading.Thread(target=run_pinned, args=(provider,)) for provider in providers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    comparison = {
+        "timestamp": datetime.now().isoformat(),
+        "model": model_info['id'],
+        "concurrency": concurrency,
+        "run_options": options,
+        "providers": {}
+    }
+    for provider in providers:
+        if output_dirs.get(provider):
+            comparison["providers"][provider] = summarize_provider_run(output_dirs[provider], provider, warmup_requests)
+        else:
+            comparison["providers"][provider] = {"provider": provider, "error": "GenAI-Perf failed"}
+    
+    with open(Path(f"results/{model_info['key']}") / PROVIDERS_FILE, 'w') as f:
+        json.dump(comparison, f, indent=2)
+    
+    for provider, result in comparison["providers"].items():
+        if "error" in result:
+            print(f"{provider}: failed")
+        else:
+            ttft = result["time_to_first_token"].get("p50", 0)
+            latency = result["request_latency"].get("p50", 0)
+            print(f"{provider}: p50 TTFT {ttft:.2f} ms, p50 latency {latency:.2f} ms, served by {result['served_by']}")
+    return comparison
+
+
+def fit_prefill_model(points):
+    """Least-squares fit of TTFT = overhead + input_tokens / prefill_rate
+
+    Returns the fixed overhead (ms), the marginal cost per input token (ms)
+    and the implied prefill speed in tokens/s, or None with fewer than two
+    distinct prompt sizes.
+    """
+    xs = [p["input_tokens"] for p in points]
+    ys = [p["ttft_p50_ms"] for p in points]
+    if len(set(xs)) < 2:
+        return None
+    
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    slope = sxy / sxx
+    intercept = mean_y - slope * mean_x
+    
+    ss_total = sum((y - mean_y) ** 2 for y in ys)
+    ss_residual = sum((y - (intercept + slope * x)) ** 2 for x, y in zip(xs, ys))
+    return {
+        "overhead_ms": intercept,
+        "ms_per_input_token": slope,
+        "prefill_tokens_per_s": 1000 / slope if slope > 0 else None,
+        "r_squared": 1 - ss_residual / ss_total if ss_total else 1.0
+    }
+
+
+def run_input_sweep(model_info, input_lengths, window_s=INPUT_SWEEP_WINDOW_S, warmup_requests=0, **options):
+    """Profile TTFT over increasing prompt sizes and fit prefill speed and fixed overhead
+
+    One request runs at a time, so at most INPUT_SWEEP_CONCURRENCY warm-up
+    requests are dropped per size; more would only thin out the slow points.
+    """
+    warmup_requests = min(warmup_requests, INPUT_SWEEP_CONCURRENCY)
+    print(f"\n{'='*60}")
+    print(f"Input-length sweep: {model_info['name']} over {', '.join(map(str, input_lengths))} tokens")
+    print(f"{'='*60}\n")
+    
+    sweep_dir = Path(f"results/{model_info['key']}/input_sweep")
+    if sweep_dir.exists():
+        shutil.rmtree(sweep_dir)
+    
+    points = []
+    for input_tokens in sorted(input_lengths):
+        output_dir = run_genai_perf_benchmark(
+            model_info, sweep_dir / f"in_{input_tokens}", INPUT_SWEEP_CONCURRENCY,
+            measurement_interval_ms=window_s * 1000, **{**options, "input_tokens": input_tokens},
+            extra_inputs={"usage": {"include": True}}  # Ask for the provider's own prompt token count
+        )
+        if not output_dir:
+            print(f"Skipping {input_tokens} input tokens: GenAI-Perf failed")
+            continue
+        
+        _, timings = split_warmup(load_request_timings(output_dir / "profile_export.json"), warmup_requests)
+        completed = [t for t in timings if not t["error"]]
+        if not completed:
+            print(f"Skipping {input_tokens} input tokens: no completed requests after warm-up "
+                  f"({len(timings)} failed)")
+            continue
+        ttft = histograms_from_timings(timings)["time_to_first_token"]
+        # Prefer the provider's token count: the gpt2 tokenizer only approximates the model's
+        reported = [t["input_tokens"] for t in completed if t["input_tokens"]]
+        points.append({
+            "target_input_tokens": input_tokens,
+            "input_tokens": sum(reported) / len(reported) if reported else input_tokens,
+            "ttft_p50_ms": ttft.percentile(50),
+            "ttft_avg_ms": ttft.mean(),
+            "request_count": len(completed)
+        })
+    
+    sweep = {
+        "timestamp": datetime.now().isoformat(),
+        "concurrency": INPUT_SWEEP_CONCURRENCY,
+        "warmup_requests": warmup_requests,
+        "run_options": options,
+        "points": points,
+        "fit": fit_prefill_model(points)
+    }
+    with open(Path(f"results/{model_info['key']}") / INPUT_SWEEP_FILE, 'w') as f:
+        json.dump(sweep, f, indent=2)
+    
+    fit = sweep["fit"]
+    if fit:
+        prefill = f"{fit['prefill_tokens_per_s']:.0f} tokens/s" if fit['prefill_tokens_per_s'] else "n/a"
+        print(f"\n{model_info['name']}: overhead {fit['overhead_ms']:.2f} ms, prefill {prefill} "
+              f"(R^2 {fit['r_squared']:.3f})")
+    else:
+        print(f"\n{model_info['name']}: not enough prompt sizes completed to fit a curve")
+    return sweep
+
+
+def filler_text(rng, num_tokens):
+    """Random text of roughly num_tokens tokens"""
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(num_tokens))
+
+
+def write_prefix_cache_inputs(path, prefix_tokens, suffix_tokens, conversations, turns, seed=0):
+    """Write a GenAI-Perf input file whose prompts share one long prefix
+
+    Every prompt starts with the same prefix (a stand-in for a shared system
+    prompt) followed by a unique suffix. With turns > 1 each conversation
+    also replays its earlier turns, so turn N shares the whole of turn N-1
+    as its prefix. GenAI-Perf sends each line as a single user message, so
+    the history is inlined as text with canned assistant replies.
+    Lines are written turn by turn (every conversation's turn 0, then every
+    turn 1, ...) so a turn is normally sent after the previous one finished.
+    """
+    rng = random.Random(seed)
+    prefix = "You are a helpful assistant. " + filler_text(rng, prefix_tokens)
+    histories = [prefix] * conversations
+    with open(path, 'w') as f:
+        for turn in range(turns):
+            for conversation in range(conversations):
+                histories[conversation] += f"\n\nUser ({conversation}-{turn}): " + filler_text(rng, suffix_tokens)
+                f.write(json.dumps({"text": histories[conversation]}) + "\n")
+                histories[conversation] += "\n\nAssistant: Understood."
+
+
+def run_prefix_cache_benchmark(model_info, concurrency, prefix_tokens=DEFAULT_PREFIX_TOKENS,
+                               suffix_tokens=DEFAULT_SUFFIX_TOKENS, conversations=DEFAULT_CONVERSATIONS, turns=1,
+                               **options):
+    """Measure TTFT for prompt-cache hits and misses on a shared-prefix workload
+
+    Requests are classified by the cached prompt tokens the provider reports
+    in its usage data; providers that report nothing are counted as unknown.
+    No warm-up requests are dropped: the first requests are the ones that
+    miss and fill the cache, and the hit/miss split already separates them.
+    """
+    print(f"\n{'='*60}")
+    print(f"Prefix caching: {model_info['name']} ({prefix_tokens}-token shared prefix, "
+          f"{conversations} conversations x {turns} turns)")
+    print(f"{'='*60}\n")
+    
+    cache_dir = Path(f"results/{model_info['key']}/prefix_cache")
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+    cache_dir.mkdir(parents=True)
+    inputs_path = cache_dir / "inputs.jsonl"
+    write_prefix_cache_inputs(inputs_path, prefix_tokens, suffix_tokens, conversations, turns)
+    
+    output_dir = run_genai_perf_benchmark(
+        model_info, cache_dir / "profile", concurrency, input_file=inputs_path,
+        extra_inputs={"usage": {"include": True}},  # Usage data carries the cached token count
+        **options
+    )
+    if not output_dir:
+        return None
+    
+    timings = [t for t in load_request_timings(output_dir / "profile_export.json") if not t["error"]]
+    groups = {
+        "cache_hit": [t for t in timings if t["cached_tokens"]],
+        "cache_miss": [t for t in timings if t["cached_tokens"] == 0],
+        "unknown": [t for t in timings if t["cached_tokens"] is None]
+    }
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "prefix_tokens": prefix_tokens,
+        "suffix_tokens": suffix_tokens,
+        "conversations": conversations,
+        "turns": turns,
+        "concurrency": concurrency,
+        "run_options": options
+    }
+    for group, group_timings in groups.items():
+        ttft = LatencyHistogram()
+        for t in group_timings:
+            ttft.record(t["ttft_ms"])
+        report[group] = {"request_count": len(group_timings), "time_to_first_token": ttft.summary()}
+        if group == "cache_hit" and group_timings:
+            report[group]["avg_cached_tokens"] = sum(t["cached_tokens"] for t in group_timings) / len(group_timings)
+    
+    classified = len(groups["cache_hit"]) + len(groups["cache_miss"])
+    report["hit_rate"] = len(groups["cache_hit"]) / classified if classified else None
+    hit_p50 = report["cache_hit"]["time_to_first_token"].get("p50")
+    miss_p50 = report["cache_miss"]["time_to_first_token"].get("p50")
+    report["ttft_saving_p50_ms"] = miss_p50 - hit_p50 if hit_p50 is not None and miss_p50 is not None else None
+    
+    with open(Path(f"results/{model_info['key']}") / PREFIX_CACHE_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+    
+    if report["hit_rate"] is None:
+        print(f"{model_info['name']}: provider did not report cached tokens; "
+              f"{len(groups['unknown'])} requests unclassified")
+    else:
+        saving = report["ttft_saving_p50_ms"]
+        print(f"{model_info['name']}: hit rate {report['hit_rate']:.0%}, p50 TTFT saving "
+              f"{f'{saving:.2f} ms' if saving is not None else 'N/A'}")
+    return report
+
+
+def calibration_key(concurrency, warmup_requests, options):
+    """Name of the floor entry (and its run folder) for one load setting and workload"""
+    key = f"c{concurrency}_w{warmup_requests}_{options['endpoint_type']}_in{options['input_tokens']}"
+    if options["endpoint_type"] == "embeddings":
+        return key + f"_b{options['batch_size']}"
+    key += f"_out{options['output_tokens'] or 'auto'}"
+    return key + ("_eos" if options["ignore_eos"] else "")
+
+
+def start_calibration_server():
+    """Start the zero-latency endpoint in a sibling container with its port published on the host
+
+    GenAI-Perf then reaches it over the same Docker bridge and NAT path
+    that real runs take, so that network overhead is part of the floor.
+    """
+    workspace_path = os.getenv('HOST_WORKSPACE_PATH', os.getcwd())
+    stop_calibration_server()  # Left over from an interrupted calibration
+    result = subprocess.run([
+        "docker", "run", "-d", "--rm",
+        "--name", CALIBRATION_CONTAINER,
+        "-v", f"{workspace_path}:/workspace",
+        "-p", f"{CALIBRATION_PORT}:{CALIBRATION_PORT}",
+        DOCKER_IMAGE,
+        "python3", "/workspace/calibration_server.py", "--host", "0.0.0.0", "--port", str(CALIBRATION_PORT)
+    ], capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"Could not start the calibration endpoint: {result.stderr.strip()}")
+        return False
+    time.sleep(2)  # Let the server bind before the first client connects
+    return True
+
+
+def stop_calibration_server():
+    """Remove the calibration endpoint container, if it is running"""
+    subprocess.run(["docker", "rm", "-f", CALIBRATION_CONTAINER], capture_output=True)
+
+
+def run_calibration(concurrency_levels, warmup_requests=0, **options):
+    """Measure the harness floor against the zero-latency endpoint at each load setting
+
+    Each floor entry records the run options and warm-up it was measured
+    with, so reports only subtract it from runs with the same workload.
+    """
+    print("\n" + "="*60)
+    print("CALIBRATING HARNESS OVERHEAD")
+    print("="*60)
+    
+    floor = {}
+    if CALIBRATION_FLOOR_FILE.exists():
+        with open(CALIBRATION_FLOOR_FILE, 'r') as f:
+            # Entries without run options predate workload matching and can never match a run
+            floor = {key: entry for key, entry in json.load(f).items() if "run_options" in entry}
+    
+    if not start_calibration_server():
+        return None
+    try:
+        for concurrency in concurrency_levels:
+            key = calibration_key(concurrency, warmup_requests, options)
+            output_dir = CALIBRATION_DIR / key
+            if output_dir.exists():
+                shutil.rmtree(output_dir)
+            if not run_genai_perf_benchmark(CALIBRATION_MODEL, output_dir, concurrency, calibration=True, **options):
+                print(f"Calibration failed at concurrency {concurrency}")
+                continue
+            if warmup_requests:
+                # Runs report steady-state statistics, so the floor must too
+                separate_warmup(output_dir, warmup_requests, options["endpoint_type"])
+            
+            stats = load_genai_perf_stats(output_dir)
+            entry = {
+                "timestamp": datetime.now().isoformat(),
+                "concurrency": concurrency,
+                "warmup_requests": warmup_requests,
+                "run_options": options
+            }
+            for metric in ['time_to_first_token', 'inter_token_latency', 'request_latency']:
+                if metric in stats:
+                    entry[metric] = {
+                        stat: stats[metric][stat]
+                        for stat in FLOOR_STATS
+                        if isinstance(stats[metric].get(stat), (int, float))
+                    }
+            floor[key] = entry
+            
+            ttft = entry.get('time_to_first_token', {}).get('p50', 'N/A')
+            latency = entry.get('request_latency', {}).get('p50', 'N/A')
+            print(f"Floor at concurrency {concurrency}: p50 TTFT {ttft} ms, p50 latency {latency} ms")
+    finally:
+        stop_calibration_server()
+    
+    with open(CALIBRATION_FLOOR_FILE, 'w') as f:
+        json.dump(floor, f, indent=2)
+    
+    print(f"\nCalibration floor saved to: {CALIBRATION_FLOOR_FILE}")
+    return floor
+
+
 def generate_summary(all_results):
     """Generate human-readable summary of benchmark results"""
     summary = []
@@ -184,10 +1328,17 @@ def generate_summary(all_results):
         summary.append(f"\nModel: {model_key}")
         summary.append("-" * 40)
         
-        if result.get("profile"):
-            profile = result["profile"]
+        if result.get("profile") or result.get("csv_file"):
             summary.append(f"Profile data available: Yes")
             summary.append(f"Timestamp: {result.get('timestamp', 'N/A')}")
+            if result.get("endpoint_type") == "embeddings":
+                throughput = result.get("embedding_throughput", {})
+                summary.append(f"Items/sec at batch size {throughput.get('batch_size')}: "
+                               f"{throughput.get('items_per_s', 0):.1f}")
+            sweep = result.get("batch_sweep")
+            if sweep and sweep.get("best_batch_size"):
+                summary.append(f"Peak items/sec: {sweep['peak_items_per_s']:.1f} "
+                               f"(batch size {sweep['best_batch_size']})")
         else:
             summary.append("Status: Benchmark did not complete successfully")
         
@@ -196,8 +1347,12 @@ def generate_summary(all_results):
     return "\n".join(summary)
 
 
-def clean_old_results():
-    """Clean all old benchmark results before running new benchmarks"""
+def clean_old_results(keep=()):
+    """Clean all old benchmark results before running new benchmarks
+
+    Entries named in `keep` (model result folders) survive alongside the
+    always-preserved calibration results.
+    """
     results_dir = Path("results")
     
     print("\n" + "="*60)
@@ -208,6 +1363,9 @@ def clean_old_results():
     if results_dir.exists():
         items_cleaned = 0
         for item in results_dir.iterdir():
+            if item.name in PRESERVED_RESULTS or item.name in keep:
+                print(f"  Keeping: {item.name}")
+                continue
             try:
                 if item.is_dir():
                     print(f"  Removing directory: {item.name}")
@@ -278,26 +1436,258 @@ def generate_llm_summary():
         print(f"Error generating LLM summary: {e}")
 
 
+def run_options_from_args(args):
+    """GenAI-Perf workload settings shared by every run mode"""
+    return {
+        "input_tokens": args.input_tokens,
+        "output_tokens": args.output_tokens,
+        "ignore_eos": args.ignore_eos,
+        "endpoint_type": args.endpoint_type,
+        "batch_size": args.batch_size
+    }
+
+
+def run_options_to_argv(options):
+    """Command line flags that reproduce run options in a worker process"""
+    argv = ["--input-tokens", str(options["input_tokens"])]
+    if options["output_tokens"]:
+        argv += ["--output-tokens", str(options["output_tokens"])]
+    if options["ignore_eos"]:
+        argv.append("--ignore-eos")
+    argv += ["--endpoint-type", options["endpoint_type"], "--batch-size", str(options["batch_size"])]
+    return argv
+
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark LLMs on OpenRouter with GenAI-Perf")
+    parser.add_argument(
+        "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+        help=f"Concurrent requests per model (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--calibrate", type=int, nargs="*", metavar="CONCURRENCY",
+        help="Measure the harness floor against a zero-latency local endpoint "
+             "at each given concurrency (default: --concurrency) instead of benchmarking"
+    )
+    parser.add_argument(
+        "--soak-minutes", type=float,
+        help="Run each model for this long in back-to-back windows, publishing live statistics"
+    )
+    parser.add_argument(
+        "--soak-window", type=int, default=SOAK_WINDOW_S, metavar="SECONDS",
+        help=f"Length of each soak measurement window (default: {SOAK_WINDOW_S})"
+    )
+    parser.add_argument(
+        "--slo-ttft-ms", type=float,
+        help=f"Search for the max load with p{SLO_PERCENTILE} TTFT under this many ms instead of benchmarking"
+    )
+    parser.add_argument(
+        "--slo-latency-ms", type=float,
+        help=f"Search for the max load with p{SLO_PERCENTILE} request latency under this many ms"
+    )
+    parser.add_argument(
+        "--slo-axis", choices=["concurrency", "request-rate"], default="concurrency",
+        help="Load axis to search (default: concurrency)"
+    )
+    parser.add_argument(
+        "--slo-max-load", type=int, default=SLO_MAX_LOAD,
+        help=f"Upper bound for the search (default: {SLO_MAX_LOAD})"
+    )
+    parser.add_argument(
+        "--warmup-requests", type=int, default=DEFAULT_WARMUP_REQUESTS,
+        help="First requests of each run reported as cold start and left out of the "
+             f"steady-state statistics (default: {DEFAULT_WARMUP_REQUESTS}, 0 to disable)"
+    )
+    parser.add_argument(
+        "--input-tokens", type=int, default=DEFAULT_INPUT_TOKENS,
+        help=f"Synthetic prompt length in tokens (default: {DEFAULT_INPUT_TOKENS})"
+    )
+    parser.add_argument(
+        "--endpoint-type", choices=ENDPOINT_TYPES, default="chat",
+        help="OpenAI-compatible endpoint to benchmark; embeddings runs use the embedding models (default: chat)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1,
+        help="Texts per embeddings request (default: 1)"
+    )
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", metavar="SIZE",
+        help="After each embeddings run, sweep these batch sizes (e.g. 1 8 32 128) and report items/s per size"
+    )
+    parser.add_argument(
+        "--output-tokens", type=int,
+        help="Target output length: caps every response at this many tokens (default: model decides)"
+    )
+    parser.add_argument(
+        "--ignore-eos", action="store_true",
+        help="With --output-tokens, ask the endpoint to ignore end-of-sequence and generate exactly "
+             "that many tokens (only honoured by some providers)"
+    )
+    parser.add_argument(
+        "--output-sweep", type=int, nargs="+", metavar="TOKENS",
+        help="Benchmark each target output length (e.g. 64 256 1024) and plot decode speed "
+             "against output length, instead of benchmarking"
+    )
+    parser.add_argument(
+        "--input-sweep", type=int, nargs="+", metavar="TOKENS",
+        help="Profile TTFT at each prompt length (e.g. 256 1024 2048 4096 8192) "
+             "and fit prefill speed, instead of benchmarking"
+    )
+    parser.add_argument(
+        "--prefix-cache", action="store_true",
+        help="Run a shared-prefix workload and report TTFT for prompt-cache hits and misses, instead of benchmarking"
+    )
+    parser.add_argument(
+        "--prefix-tokens", type=int, default=DEFAULT_PREFIX_TOKENS,
+        help=f"Shared prefix length for --prefix-cache (default: {DEFAULT_PREFIX_TOKENS})"
+    )
+    parser.add_argument(
+        "--suffix-tokens", type=int, default=DEFAULT_SUFFIX_TOKENS,
+        help=f"Unique suffix length per turn for --prefix-cache (default: {DEFAULT_SUFFIX_TOKENS})"
+    )
+    parser.add_argument(
+        "--conversations", type=int, default=DEFAULT_CONVERSATIONS,
+        help=f"Number of conversations for --prefix-cache (default: {DEFAULT_CONVERSATIONS})"
+    )
+    parser.add_argument(
+        "--turns", type=int, default=1,
+        help="Turns per conversation for --prefix-cache; later turns replay earlier ones (default: 1)"
+    )
+    parser.add_argument(
+        "--providers", nargs="+", metavar="PROVIDER",
+        help="Benchmark each model pinned to each of these OpenRouter providers "
+             "(e.g. DeepInfra Together Lambda), in parallel, instead of benchmarking"
+    )
+    parser.add_argument(
+        "--model", metavar="KEY",
+        help="Only benchmark this model (its results folder name, e.g. llama-3.1-8b)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Spread each model's load over this many local worker processes"
+    )
+    parser.add_argument(
+        "--worker-hosts", nargs="+", metavar="HOST",
+        help="Run one worker per host ('local' or an ssh destination) instead of --workers"
+    )
+    # Internal: options a coordinator passes to its workers
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.endpoint_type != "embeddings" and (args.batch_size != 1 or args.batch_sizes):
+        parser.error("--batch-size and --batch-sizes only apply to --endpoint-type embeddings")
+    if args.endpoint_type == "embeddings" and (args.output_tokens or args.output_sweep):
+        parser.error("embeddings responses have no output tokens")
+    if args.endpoint_type == "embeddings" and (args.input_sweep or args.prefix_cache or args.slo_ttft_ms is not None):
+        parser.error("--input-sweep, --prefix-cache and --slo-ttft-ms measure TTFT, which embeddings do not have; "
+                     "use --slo-latency-ms for embeddings")
+    return args
+
+
 def main():
     """Main benchmarking workflow"""
+    args = parse_args()
+    options = run_options_from_args(args)
+    
+    if args.calibrate is not None:
+        Path("results").mkdir(exist_ok=True)
+        run_calibration(args.calibrate or [args.concurrency], args.warmup_requests, **options)
+        return
+    
+    if not OPENROUTER_API_KEY:
+        print("ERROR: OPENROUTER_API_KEY environment variable not set!")
+        print("Please set it with: export OPENROUTER_API_KEY='your-key-here'")
+        exit(1)
+    
+    if args.worker:
+        run_worker(get_model(args.model), args.concurrency, args.output_dir, args.warmup_requests, **options)
+        return
+    
+    embeddings = args.endpoint_type == "embeddings"
+    models = [get_model(args.model)] if args.model else (EMBEDDING_MODELS if embeddings else MODELS)
+    
+    # The modes below add to the latest results rather than replacing them
+    if args.output_sweep:
+        sweep_options = {k: v for k, v in options.items() if k not in ("output_tokens", "ignore_eos")}
+        for model in models:
+            run_output_sweep(model, args.output_sweep, args.concurrency, args.ignore_eos, args.warmup_requests,
+                             **sweep_options)
+        return
+    
+    if args.input_sweep:
+        for model in models:
+            run_input_sweep(model, args.input_sweep, warmup_requests=args.warmup_requests, **options)
+        return
+    
+    if args.prefix_cache:
+        for model in models:
+            run_prefix_cache_benchmark(model, args.concurrency, args.prefix_tokens, args.suffix_tokens,
+                                       args.conversations, args.turns, **options)
+        return
+    
+    if args.providers:
+        for model in models:
+            run_provider_comparison(model, args.providers, args.concurrency, args.warmup_requests, **options)
+        return
+    
+    if args.slo_ttft_ms is not None or args.slo_latency_ms is not None:
+        for model in models:
+            run_slo_search(model, args.slo_ttft_ms, args.slo_latency_ms, args.slo_axis, args.slo_max_load,
+                           warmup_requests=args.warmup_requests, **options)
+        return
+    
+    worker_hosts = args.worker_hosts or (["local"] * args.workers if args.workers > 1 else None)
+    
     print("="*60)
     print("LLM Benchmarking with OpenRouter and GenAI-Perf")
     print("="*60)
     print("\nThis will take approximately 7-10 minutes to complete...")
     print("="*60)
     
-    # Step 1: Clean old results
-    clean_old_results()
+    # Step 1: Clean old results, keeping the latest results of the other endpoint family
+    # so chat and embeddings models show side by side on the dashboard
+    other_keys = {m['key'] for m in (MODELS if embeddings else EMBEDDING_MODELS)} - {m['key'] for m in models}
+    previous_results = {}
+    if Path("results/benchmark_results.json").exists():
+        with open("results/benchmark_results.json", 'r') as f:
+            previous_results = {k: v for k, v in json.load(f).items() if k in other_keys}
+    clean_old_results(keep=other_keys)
     
     # Step 2: Create results directory
     Path("results").mkdir(exist_ok=True)
     
     # Run benchmarks for all models
-    all_results = {}
-    for model in MODELS:
-        output_dir = run_genai_perf_benchmark(model)
+    all_results = dict(previous_results)
+    for index, model in enumerate(models, 1):
+        # Parsed by the dashboard for its progress bar and /metrics labels (web_app.MODEL_PROGRESS_LINE)
+        print(f"Model {index} of {len(models)}: {model['key']} at concurrency {args.concurrency}")
+        if args.soak_minutes:
+            output_dir = run_soak_benchmark(model, args.concurrency, args.soak_minutes * 60, args.soak_window,
+                                            args.warmup_requests, **options)
+        elif worker_hosts:
+            output_dir = run_distributed_benchmark(model, args.concurrency, worker_hosts, args.warmup_requests, **options)
+        else:
+            output_dir = run_genai_perf_benchmark(model, concurrency=args.concurrency, **options)
+            if output_dir and args.warmup_requests:
+                separate_warmup(output_dir, args.warmup_requests, args.endpoint_type)
+            if output_dir and not embeddings:
+                write_decode_breakdown(output_dir, args.warmup_requests, args.output_tokens, args.ignore_eos)
         if output_dir:
             results = parse_genai_perf_results(output_dir)
+            results["request_count"], results["error_count"] = steady_state_counts(output_dir, results)
+            save_run_config(output_dir, concurrency=args.concurrency, workers=len(worker_hosts or ["local"]),
+                            warmup_requests=args.warmup_requests,
+                            served_by=results.get("served_by", {}),
+                            request_count=results["request_count"],
+                            error_count=results["error_count"], **options)
+            results["concurrency"] = args.concurrency
+            results["endpoint_type"] = args.endpoint_type
+            if embeddings:
+                results["embedding_throughput"] = embedding_throughput(output_dir, args.batch_size)
+                if args.batch_sizes:
+                    results["batch_sweep"] = run_batch_sweep(model, args.batch_sizes, args.concurrency, **options)
             all_results[model['key']] = results
     
     # Save combined results
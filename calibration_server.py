@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Zero-Latency OpenAI-Compatible Endpoint
+Answers every request immediately so GenAI-Perf runs against it measure
+only the harness itself (Docker networking, the GenAI-Perf client, tokenization)
+"""
+
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8999
+DEFAULT_OUTPUT_TOKENS = 16
+EMBEDDING_DIMENSIONS = 1536  # Same response size as text-embedding-3-small
+
+
+class ZeroLatencyHandler(BaseHTTPRequestHandler):
+    """Handler that returns canned completions without any artificial delay"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, like a real provider
+
+    def log_message(self, format, *args):
+        # Per-request access logs would cost more than the responses themselves
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/health'):
+            self._send_json({"status": "ok"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError:
+            self._send_json({"error": "invalid JSON"}, status=400)
+            return
+
+        if self.path.endswith('/chat/completions'):
+            self._complete(body, chat=True)
+        elif self.path.endswith('/completions'):
+            self._complete(body, chat=False)
+        elif self.path.endswith('/embeddings'):
+            self._embed(body)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _complete(self, body, chat):
+        """Answer a chat or plain completion request, streamed or not"""
+        model = body.get('model', 'calibration')
+        num_tokens = body.get('max_tokens') or DEFAULT_OUTPUT_TOKENS
+        created = int(time.time())
+        object_name = "chat.completion" if chat else "text_completion"
+
+        if not body.get('stream'):
+            text = " token" * num_tokens
+            choice = {"index": 0, "finish_reason": "length"}
+            if chat:
+                choice["message"] = {"role": "assistant", "content": text}
+            else:
+                choice["text"] = text
+            self._send_json({
+                "id": "calibration",
+                "object": object_name,
+                "created": created,
+                "model": model,
+                "choices": [choice],
+                "usage": {"prompt_tokens": 0, "completion_tokens": num_tokens}
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i in range(num_tokens):
+            choice = {"index": 0, "finish_reason": "length" if i == num_tokens - 1 else None}
+            if chat:
+                choice["delta"] = {"content": " token"}
+            else:
+                choice["text"] = " token"
+            chunk = {
+                "id": "calibration",
+                "object": f"{object_name}.chunk",
+                "created": created,
+                "model": model,
+                "choices": [choice]
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self._write_chunk("")
+
+    def _embed(self, body):
+        """Answer an embeddings request with one zero vector per input text"""
+        texts = body.get('input') or []
+        if isinstance(texts, str):
+            texts = [texts]
+        self._send_json({
+            "object": "list",
+            "model": body.get('model', 'calibration'),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": [0.0] * EMBEDDING_DIMENSIONS}
+                for i in range(len(texts))
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}
+        })
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zero-latency OpenAI-compatible endpoint for harness calibration")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), ZeroLatencyHandler)
+    server.daemon_threads = True
+    print(f"Calibration endpoint listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -45,6 +45,25 @@ def read_csv_metrics(csv_path):
     
     return metrics
 
+def add_embeddings_context(metrics, run_config_path):
+    """Label embeddings results and add their throughput in texts embedded per second"""
+    if not run_config_path.exists():
+        return
+    with open(run_config_path, 'r') as f:
+        run_config = json.load(f)
+    if run_config.get('endpoint_type') != 'embeddings':
+        return
+    batch_size = run_config.get('batch_size', 1)
+    metrics['Endpoint Type'] = f"embeddings (batch size {batch_size}, no token metrics)"
+    request_throughput = metrics.get('Request Throughput (per sec)')
+    if isinstance(request_throughput, dict):
+        request_throughput = request_throughput.get('avg')
+    try:
+        items = float(str(request_throughput).replace(',', '')) * batch_size
+        metrics['Items Throughput (per sec)'] = f"{items:,.2f}"
+    except ValueError:
+        pass
+
 def collect_benchmark_data():
     """Collect all benchmark results from the results directory"""
     results_dir = Path("results")
@@ -52,7 +71,8 @@ def collect_benchmark_data():
     models = {
         "GPT-4o Mini": "gpt-4o-mini",
         "Claude 3 Haiku": "claude-3-haiku",
-        "Llama 3.1 8B": "llama-3.1-8b"
+        "Llama 3.1 8B": "llama-3.1-8b",
+        "Text Embedding 3 Small": "text-embedding-3-small"
     }
     
     benchmark_data = {}
@@ -61,6 +81,7 @@ def collect_benchmark_data():
         csv_path = results_dir / model_key / "profile_export_genai_perf.csv"
         if csv_path.exists():
             metrics = read_csv_metrics(csv_path)
+            add_embeddings_context(metrics, results_dir / model_key / "run_config.json")
             benchmark_data[model_name] = metrics
         else:
             print(f"Warning: Results not found for {model_name}")
@@ -93,7 +114,7 @@ def format_data_for_llm(benchmark_data):
 def call_claude_for_summary(benchmark_data_text):
     """Call Claude via OpenRouter to generate a human-readable summary"""
     
-    prompt = f"""You are an expert in LLM performance analysis. I've benchmarked three different LLM models using NVIDIA GenAI-Perf through OpenRouter. Please analyze the following performance data and provide a comprehensive, human-readable summary.
+    prompt = f"""You are an expert in LLM performance analysis. I've benchmarked several models using NVIDIA GenAI-Perf through OpenRouter. Please analyze the following performance data and provide a comprehensive, human-readable summary. Models marked as embeddings return vectors, not text: they have no token metrics, so judge them by request latency and items (texts embedded) per second, not against the chat models.
 
 {benchmark_data_text}
 
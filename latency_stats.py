@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Mergeable Latency Statistics
+Log-bucketed (HDR-style) histograms and helpers for reading GenAI-Perf
+per-request exports, so percentiles can be merged across worker processes
+"""
+
+import json
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Percentiles reported in the same layout GenAI-Perf uses
+REPORTED_PERCENTILES = [99, 95, 90, 75, 50, 25]
+
+# Same tokenizer GenAI-Perf is run with, for responses without usage data
+TOKENIZER = "gpt2"
+_tokenizer_instance = None
+
+
+class LatencyHistogram:
+    """Histogram with logarithmic buckets and a bounded relative error
+
+    Values are counted in buckets whose width grows with the value, like an
+    HDR histogram: every recorded value is within `relative_error` of the
+    bucket it lands in, memory depends only on the value range (not on the
+    number of samples), and two histograms merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_error=0.01):
+        self.relative_error = relative_error
+        self._log_base = math.log1p(relative_error)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value, count=1):
+        """Record a non-negative value (negative values are clamped to zero)"""
+        value = max(float(value), 0.0)
+        if value == 0.0:
+            self.zero_count += count
+        else:
+            index = math.floor(math.log(value) / self._log_base)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """Add another histogram's counts into this one"""
+        if other.relative_error != self.relative_error:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, bucket_count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + bucket_count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, p):
+        """Value at the given percentile (0-100), or None if nothing was recorded"""
+        if self.count == 0:
+            return None
+        rank = max(math.ceil(p / 100 * self.count), 1)
+        seen = self.zero_count
+        if seen >= rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Midpoint of the bucket, kept inside the observed range
+                value = math.exp((index + 0.5) * self._log_base)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self):
+        """Statistics in GenAI-Perf's JSON export layout (avg, min, max, pNN)"""
+        if self.count == 0:
+            return {}
+        stats = {"avg": self.mean(), "min": self.min, "max": self.max}
+        for p in REPORTED_PERCENTILES:
+            stats[f"p{p}"] = self.percentile(p)
+        return stats
+
+    def to_dict(self):
+        return {
+            "relative_error": self.relative_error,
+            "buckets": {str(index): c for index, c in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["relative_error"])
+        histogram.buckets = {int(index): c for index, c in data["buckets"].items()}
+        histogram.zero_count = data["zero_count"]
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+def _parse_response(text):
+    """Yield the JSON bodies in one response, unwrapping SSE 'data:' lines
+
+    SSE comments (e.g. ': OPENROUTER PROCESSING') and '[DONE]' yield nothing.
+    """
+    try:
+        # Non-streaming responses (e.g. embeddings) are one JSON body, possibly pretty-printed
+        bodies = [json.loads(text)]
+    except json.JSONDecodeError:
+        bodies = []
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith("data:"):
+                line = line[len("data:"):].strip()
+            if not line or line == "[DONE]":
+                continue
+            try:
+                bodies.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    yield from (body for body in bodies if isinstance(body, dict))
+
+
+def response_payloads(output):
+    """JSON bodies of one entry of a request's response_outputs"""
+    text = output.get("response", "") if isinstance(output, dict) else str(output)
+    return list(_parse_response(text))
+
+
+def _has_content(payloads):
+    """True if a response carries generated text or embeddings, not just a role, usage or keep-alive"""
+    for payload in payloads:
+        if payload.get("data"):
+            return True
+        for choice in payload.get("choices", []):
+            delta = choice.get("delta") or choice.get("message") or {}
+            if delta.get("content") or choice.get("text"):
+                return True
+    return False
+
+
+def _tokenizer():
+    """GenAI-Perf's tokenizer, loaded on first use, or None if transformers or the model files are unavailable"""
+    global _tokenizer_instance
+    if _tokenizer_instance is None:
+        try:
+            from transformers import AutoTokenizer
+            _tokenizer_instance = AutoTokenizer.from_pretrained(TOKENIZER)
+        except (ImportError, OSError):
+            _tokenizer_instance = False
+    return _tokenizer_instance or None
+
+
+def _output_tokens(payloads):
+    """Output token count from usage if reported, else from tokenizing the generated text
+
+    Returns (count, source) with source "usage" or "tokenizer", or
+    (None, None) if neither is available. Stream chunks are not counted:
+    many providers send several tokens per chunk.
+    """
+    text = []
+    for payload in payloads:
+        usage = payload.get("usage") or {}
+        if usage.get("completion_tokens"):
+            return usage["completion_tokens"], "usage"
+        for choice in payload.get("choices", []):
+            delta = choice.get("delta") or choice.get("message") or {}
+            content = delta.get("content") or choice.get("text")
+            if content:
+                text.append(content)
+    tokenizer = _tokenizer() if text else None
+    if tokenizer is None:
+        return None, None
+    return len(tokenizer.encode("".join(text), add_special_tokens=False)), "tokenizer"
+
+
+def _input_tokens(payloads):
+    """Prompt token count as reported by the provider's usage block, if any"""
+    for payload in payloads:
+        usage = payload.get("usage") or {}
+        if usage.get("prompt_tokens"):
+            return usage["prompt_tokens"]
+    return None
+
+
+def _cached_tokens(payloads):
+    """Prompt tokens served from the provider's prompt cache, or None if not reported"""
+    for payload in payloads:
+        details = (payload.get("usage") or {}).get("prompt_tokens_details")
+        if isinstance(details, dict) and details.get("cached_tokens") is not None:
+            return details["cached_tokens"]
+    return None
+
+
+def load_request_timings(profile_export_path):
+    """Read per-request timings (ms) from a GenAI-Perf profile_export.json"""
+    with open(profile_export_path, 'r') as f:
+        export = json.load(f)
+
+    if "experiments" in export:
+        requests = [r for experiment in export["experiments"] for r in experiment.get("requests", [])]
+    else:
+        requests = export.get("data", [])
+
+    timings = []
+    for request in requests:
+        start = request.get("timestamp")
+        timestamps = request.get("response_timestamps") or []
+        outputs = request.get("response_outputs")
+        if outputs is None:
+            # Nothing to pair the timestamps with, so every response counts as content
+            responses = [(ts, []) for ts in timestamps]
+            content_timestamps = timestamps
+        else:
+            # Like GenAI-Perf, time only responses with content: keep-alive comments,
+            # role-only first deltas, usage-only chunks and [DONE] are skipped
+            responses = [(ts, response_payloads(output)) for ts, output in zip(timestamps, outputs)]
+            content_timestamps = [ts for ts, bodies in responses if _has_content(bodies)]
+        payloads = [payload for _, bodies in responses for payload in bodies]
+        error = start is None or not content_timestamps or any("error" in p for p in payloads)
+        end = content_timestamps[-1] if content_timestamps else (timestamps[-1] if timestamps else start)
+        timing = {"start_ns": start, "end_ns": end, "error": error}
+        if not error:
+            timing["ttft_ms"] = (content_timestamps[0] - start) / 1e6
+            timing["latency_ms"] = (content_timestamps[-1] - start) / 1e6
+            timing["output_tokens"], timing["output_tokens_source"] = _output_tokens(payloads)
+            timing["input_tokens"] = _input_tokens(payloads)
+            timing["cached_tokens"] = _cached_tokens(payloads)
+            # GenAI-Perf's definition: decode time spread over the tokens after the first
+            if (timing["output_tokens"] or 0) > 1:
+                timing["itl_ms"] = (timing["latency_ms"] - timing["ttft_ms"]) / (timing["output_tokens"] - 1)
+            else:
+                timing["itl_ms"] = None
+        timing["payloads"] = payloads
+        timings.append(timing)
+    return timings
+
+
+def served_by(timings):
+    """Count which upstream provider served each request (OpenRouter reports it per response)"""
+    providers = {}
+    for timing in timings:
+        provider = next((p["provider"] for p in timing["payloads"] if p.get("provider")), None)
+        if provider:
+            providers[provider] = providers.get(provider, 0) + 1
+    return providers
+
+
+def active_duration_s(timings):
+    """Seconds from the earliest completed request's start to the latest one's end (0 if none completed)"""
+    completed = [t for t in timings if not t["error"]]
+    if not completed:
+        return 0
+    return (max(t["end_ns"] for t in completed) - min(t["start_ns"] for t in completed)) / 1e9
+
+
+def split_warmup(timings, warmup_requests):
+    """Split timings into the first `warmup_requests` sent (cold start) and the rest (steady state)"""
+    ordered = sorted(timings, key=lambda t: t["start_ns"] or 0)
+    return ordered[:warmup_requests], ordered[warmup_requests:]
+
+
+def decode_breakdown(timings):
+    """Split each request into prefill (TTFT) and decode (everything after the first token)
+
+    Only requests whose token count comes from the provider's usage data
+    are used: a tokenizer estimate would make decode speed a guess. Requests
+    with fewer than two output tokens have no decode phase and are skipped.
+    Returns one dict per request with the output length, decode time, mean
+    inter-token latency and decode speed in tokens/s.
+    """
+    points = []
+    for timing in timings:
+        if timing["error"] or timing["output_tokens_source"] != "usage" or timing["output_tokens"] < 2:
+            continue
+        decode_ms = timing["latency_ms"] - timing["ttft_ms"]
+        decode_tokens = timing["output_tokens"] - 1
+        if decode_ms <= 0:
+            continue
+        points.append({
+            "output_tokens": timing["output_tokens"],
+            "ttft_ms": timing["ttft_ms"],
+            "decode_ms": decode_ms,
+            "itl_ms": decode_ms / decode_tokens,
+            "decode_tokens_per_s": decode_tokens / decode_ms * 1000
+        })
+    return points
+
+
+def histograms_from_timings(timings):
+    """Build TTFT, ITL, latency and output length histograms from request timings"""
+    histograms = {
+        "time_to_first_token": LatencyHistogram(),
+        "inter_token_latency": LatencyHistogram(),
+        "request_latency": LatencyHistogram(),
+        "output_sequence_length": LatencyHistogram()
+    }
+    for timing in timings:
+        if timing["error"]:
+            continue
+        histograms["time_to_first_token"].record(timing["ttft_ms"])
+        histograms["request_latency"].record(timing["latency_ms"])
+        if timing["output_tokens"] is not None:
+            histograms["output_sequence_length"].record(timing["output_tokens"])
+        if timing["itl_ms"] is not None:
+            histograms["inter_token_latency"].record(timing["itl_ms"])
+    return histograms
+
+
+class StreamingStats:
+    """Running TTFT, ITL and latency statistics for long runs
+
+    Request timings are folded into histograms and counters as they arrive
+    and then dropped, so memory stays constant however long the run lasts.
+    """
+
+    def __init__(self):
+        self.histograms = {
+            "time_to_first_token": LatencyHistogram(),
+            "inter_token_latency": LatencyHistogram(),
+            "request_latency": LatencyHistogram(),
+            "output_sequence_length": LatencyHistogram()
+        }
+        self.request_count = 0
+        self.error_count = 0
+        self.output_tokens = 0
+        self.active_s = 0.0
+        self.windows = 0
+        self.started = time.monotonic()
+        self.started_at = datetime.now().isoformat()
+
+    def add_timings(self, timings):
+        """Fold one measurement window of request timings into the running totals"""
+        for name, histogram in histograms_from_timings(timings).items():
+            self.histograms[name].merge(histogram)
+        completed = [t for t in timings if not t["error"]]
+        self.request_count += len(completed)
+        self.error_count += len(timings) - len(completed)
+        self.output_tokens += sum(t["output_tokens"] or 0 for t in completed)
+        self.active_s += active_duration_s(timings)
+        self.windows += 1
+
+    def as_merged(self):
+        """Totals in the shape merged worker results use, for writing exports"""
+        return {
+            "histograms": self.histograms,
+            "request_throughput": self.request_count / self.active_s if self.active_s else 0,
+            # None when no request had a known token count, so it is not reported as 0 tokens/s
+            "output_token_throughput": (self.output_tokens / self.active_s if self.active_s else 0)
+            if self.histograms["output_sequence_length"].count else None,
+            "request_count": self.request_count,
+            "error_count": self.error_count
+        }
+
+    def snapshot(self, **extra):
+        """JSON-ready view of the current statistics for live dashboards"""
+        merged = self.as_merged()
+        snapshot = {
+            "started_at": self.started_at,
+            "updated_at": datetime.now().isoformat(),
+            "elapsed_s": time.monotonic() - self.started,
+            "windows": self.windows,
+            "request_count": self.request_count,
+            "error_count": self.error_count,
+            "request_throughput": merged["request_throughput"],
+            "output_token_throughput": merged["output_token_throughput"],
+            **extra
+        }
+        for name, histogram in self.histograms.items():
+            snapshot[name] = histogram.summary()
+        return snapshot
+
+
+def save_histograms(histograms, path):
+    """Write histograms as JSON so they can be merged by another process"""
+    with open(Path(path), 'w') as f:
+        json.dump({name: h.to_dict() for name, h in histograms.items()}, f)
@@ -4,11 +4,13 @@ LLM Benchmark Web Dashboard
 Flask web interface for running benchmarks and viewing results
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+from flask import Flask, Response, render_template, jsonify, request, redirect, url_for
 import json
 import csv
 import subprocess
 import os
+import re
+import shlex
 from pathlib import Path
 from datetime import datetime
 import threading
@@ -19,10 +21,79 @@ app = Flask(__name__)
 benchmark_status = {
     'running': False,
     'current_model': None,
+    'concurrency': None,
     'progress': 0,
     'logs': []
 }
 
+# Printed by benchmark.py before each model of a run
+MODEL_PROGRESS_LINE = re.compile(r'^Model (\d+) of (\d+): (\S+) at concurrency (\d+)$')
+
+# Harness floor measured by `python benchmark.py --calibrate`
+CALIBRATION_FLOOR_PATH = Path("results/calibration/floor.json")
+FLOOR_MODES = ('subtract', 'annotate')
+FLOORED_METRICS = {
+    'Time to First Token (ms)': 'time_to_first_token',
+    'Inter Token Latency (ms)': 'inter_token_latency',
+    'Request Latency (ms)': 'request_latency'
+}
+
+# Token metrics that embeddings runs do not have (older exports carried placeholder rows)
+EMBEDDINGS_HIDDEN_METRICS = ['Time to First Token (ms)', 'Time To First Token (ms)', 'Inter Token Latency (ms)',
+                             'Output Sequence Length', 'Output Token Throughput (per sec)',
+                             'Cold-Start Time to First Token (ms)']
+
+# Metrics measured over each run's first (warm-up) requests
+COLD_START_METRICS = {
+    'Cold-Start Time to First Token (ms)': 'time_to_first_token',
+    'Cold-Start Request Latency (ms)': 'request_latency'
+}
+
+# Prometheus /metrics: results gauges are cached until a result file changes
+metrics_cache = {'signature': None, 'text': ''}
+metrics_lock = threading.Lock()
+live_stats_cache = {}  # live_stats.json path -> (mtime, snapshot)
+# A soak snapshot not refreshed for this many windows (GenAI-Perf start-up included) belongs to a killed run
+LIVE_STATS_STALE_WINDOWS = 3
+LIVE_STATS_MIN_STALE_S = 300
+METRICS_SOURCE_FILES = ['profile_export_genai_perf.csv', 'profile_export_genai_perf.json', 'run_config.json',
+                        'warmup_split.json']
+LATENCY_METRIC_SOURCES = {
+    'llm_benchmark_time_to_first_token_ms': ['Time to First Token (ms)', 'Time To First Token (ms)'],
+    'llm_benchmark_inter_token_latency_ms': ['Inter Token Latency (ms)'],
+    'llm_benchmark_request_latency_ms': ['Request Latency (ms)'],
+    'llm_benchmark_cold_start_time_to_first_token_ms': ['Cold-Start Time to First Token (ms)'],
+    'llm_benchmark_cold_start_request_latency_ms': ['Cold-Start Request Latency (ms)']
+}
+RESULTS_METRIC_FAMILIES = {
+    'llm_benchmark_time_to_first_token_ms': 'Time to first token of the latest run (ms)',
+    'llm_benchmark_inter_token_latency_ms': 'Inter-token latency of the latest run (ms)',
+    'llm_benchmark_request_latency_ms': 'Request latency of the latest run (ms)',
+    'llm_benchmark_cold_start_time_to_first_token_ms': 'Time to first token of the latest run\'s warm-up requests (ms)',
+    'llm_benchmark_cold_start_request_latency_ms': 'Request latency of the latest run\'s warm-up requests (ms)',
+    'llm_benchmark_output_token_throughput': 'Output tokens per second of the latest run',
+    'llm_benchmark_request_throughput': 'Requests per second of the latest run',
+    'llm_benchmark_items_throughput': 'Texts embedded per second of the latest embeddings run',
+    'llm_benchmark_requests': 'Completed requests in the latest run',
+    'llm_benchmark_errors': 'Failed requests in the latest run',
+    'llm_benchmark_last_run_timestamp_seconds': 'When the latest run finished (Unix time)'
+}
+LIVE_LATENCY_METRICS = {
+    'llm_benchmark_live_time_to_first_token_ms': 'time_to_first_token',
+    'llm_benchmark_live_inter_token_latency_ms': 'inter_token_latency',
+    'llm_benchmark_live_request_latency_ms': 'request_latency'
+}
+LIVE_METRIC_FAMILIES = {
+    'llm_benchmark_live_requests': 'Completed requests so far in the active soak run',
+    'llm_benchmark_live_errors': 'Failed requests so far in the active soak run',
+    'llm_benchmark_live_request_throughput': 'Requests per second so far in the active soak run',
+    'llm_benchmark_live_output_token_throughput': 'Output tokens per second so far in the active soak run',
+    'llm_benchmark_live_elapsed_seconds': 'Time since the active soak run started',
+    'llm_benchmark_live_time_to_first_token_ms': 'Time to first token so far in the active soak run (ms)',
+    'llm_benchmark_live_inter_token_latency_ms': 'Inter-token latency so far in the active soak run (ms)',
+    'llm_benchmark_live_request_latency_ms': 'Request latency so far in the active soak run (ms)'
+}
+
 def read_csv_metrics(csv_path):
     """Read GenAI-Perf CSV results"""
     metrics = {}
@@ -72,17 +143,129 @@ def read_csv_metrics(csv_path):
         traceback.print_exc()
     return metrics
 
-def get_benchmark_results():
-    """Collect all benchmark results"""
+def parse_metric_value(value):
+    """Parse a formatted metric value such as '1,234.56', returning None if not numeric"""
+    try:
+        return float(str(value).replace(',', ''))
+    except (ValueError, TypeError):
+        return None
+
+def get_floor_mode():
+    """Read the requested calibration floor handling from the query string"""
+    mode = request.args.get('floor')
+    return mode if mode in FLOOR_MODES else None
+
+def get_calibration_floor():
+    """Read the harness floor entries (one per load setting and workload), if calibration has been run"""
+    if CALIBRATION_FLOOR_PATH.exists():
+        try:
+            with open(CALIBRATION_FLOOR_PATH, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading calibration floor: {e}")
+    return {}
+
+def match_calibration_floor(calibration_floor, run_config):
+    """Pick the floor measured with the same concurrency, warm-up and run options as a run, if any"""
+    for entry in calibration_floor.values():
+        options = entry.get('run_options')
+        if options is None or entry.get('concurrency') != run_config.get('concurrency'):
+            continue
+        if entry.get('warmup_requests') != run_config.get('warmup_requests', 0):
+            continue
+        if all(run_config.get(option) == value for option, value in options.items()):
+            return entry
+    return None
+
+def calibration_command(run_config):
+    """Command that measures the floor matching a run's settings"""
+    command = ["python", "benchmark.py", "--calibrate", str(run_config.get('concurrency', ''))]
+    command += ["--warmup-requests", str(run_config.get('warmup_requests', 0))]
+    if run_config.get('input_tokens'):
+        command += ["--input-tokens", str(run_config['input_tokens'])]
+    if run_config.get('output_tokens'):
+        command += ["--output-tokens", str(run_config['output_tokens'])]
+    if run_config.get('ignore_eos'):
+        command.append("--ignore-eos")
+    if run_config.get('endpoint_type', 'chat') != 'chat':
+        command += ["--endpoint-type", run_config['endpoint_type']]
+    if run_config.get('endpoint_type') == 'embeddings':
+        command += ["--batch-size", str(run_config.get('batch_size', 1))]
+    return shlex.join(command)
+
+def read_model_json(model_key, filename):
+    """Read a JSON file from a model's results directory, or {} if missing"""
+    json_path = Path("results") / model_key / filename
+    if json_path.exists():
+        try:
+            with open(json_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error reading {json_path}: {e}")
+    return {}
+
+def get_run_config(model_key):
+    """Read the load settings recorded for a model's latest run"""
+    return read_model_json(model_key, "run_config.json")
+
+def get_slo_search(model_key):
+    """Read the latest max sustainable load search for a model"""
+    return read_model_json(model_key, "slo_search.json")
+
+def subtract_calibration_floor(metrics, floor):
+    """Subtract the harness floor from each latency statistic, clamping at zero
+
+    The harness overhead is treated as a constant: the floor's p50 is taken
+    off every statistic, so avg/min/max and the percentiles keep their order.
+    """
+    for metric_name, floor_key in FLOORED_METRICS.items():
+        stats = metrics.get(metric_name)
+        floor_stats = floor.get(floor_key) or {}
+        offset = floor_stats.get('p50', floor_stats.get('avg'))
+        if not isinstance(stats, dict) or offset is None:
+            continue
+        for stat, value in stats.items():
+            parsed = parse_metric_value(value)
+            if parsed is not None:
+                stats[stat] = f"{max(parsed - offset, 0):.2f}"
+
+def get_input_sweep(model_key):
+    """Read the latest input-length sweep and prefill fit for a model"""
+    return read_model_json(model_key, "input_sweep.json")
+
+def get_prefix_cache(model_key):
+    """Read the latest prompt-prefix caching measurement for a model"""
+    return read_model_json(model_key, "prefix_cache.json")
+
+def get_decode_breakdown(model_key):
+    """Read the latest prefill/decode breakdown (single run or output-length sweep) for a model"""
+    return read_model_json(model_key, "decode_breakdown.json")
+
+def get_batch_sweep(model_key):
+    """Read the latest embeddings batch-size sweep for a model"""
+    return read_model_json(model_key, "batch_sweep.json")
+
+def get_provider_comparison(model_key):
+    """Read the latest provider-pinned comparison for a model"""
+    return read_model_json(model_key, "providers.json")
+
+def get_benchmark_results(floor_mode=None):
+    """Collect all benchmark results
+
+    floor_mode='annotate' attaches the matching harness floor to each model,
+    floor_mode='subtract' also removes it from the latency metrics.
+    """
     results_dir = Path("results")
     
     models = {
         "GPT-4o Mini": "gpt-4o-mini",
         "Claude 3 Haiku": "claude-3-haiku",
-        "Llama 3.1 8B": "llama-3.1-8b"
+        "Llama 3.1 8B": "llama-3.1-8b",
+        "Text Embedding 3 Small": "text-embedding-3-small"
     }
     
     results = {}
+    calibration_floor = get_calibration_floor() if floor_mode else {}
     
     for model_name, model_key in models.items():
         csv_path = results_dir / model_key / "profile_export_genai_perf.csv"
@@ -113,10 +296,37 @@ def get_benchmark_results():
                 except Exception as e:
                     print(f"Error reading JSON for {model_name}: {e}")
             
+            # Cold-start requests are reported separately from the steady-state metrics above
+            cold_start = read_model_json(model_key, "warmup_split.json").get('cold_start', {})
+            for metric_name, cold_key in COLD_START_METRICS.items():
+                if cold_start.get(cold_key):
+                    metrics[metric_name] = {stat: f"{value:.2f}" for stat, value in cold_start[cold_key].items()}
+            
+            run_config = get_run_config(model_key)
+            concurrency = run_config.get('concurrency')
+            endpoint_type = run_config.get('endpoint_type', 'chat')
+            batch_size = run_config.get('batch_size', 1)
+            if endpoint_type == 'embeddings':
+                for metric_name in EMBEDDINGS_HIDDEN_METRICS:
+                    metrics.pop(metric_name, None)
+                # Each request embeds batch_size texts
+                request_throughput = parse_metric_value(metrics.get('Request Throughput (per sec)'))
+                if request_throughput is not None:
+                    metrics['Items Throughput (per sec)'] = f"{request_throughput * batch_size:,.2f}"
+            floor = match_calibration_floor(calibration_floor, run_config) if floor_mode else None
+            if floor and floor_mode == 'subtract':
+                subtract_calibration_floor(metrics, floor)
+            
             results[model_name] = {
                 'metrics': metrics,
                 'exists': True,
-                'key': model_key
+                'key': model_key,
+                'concurrency': concurrency,
+                'endpoint_type': endpoint_type,
+                'batch_size': batch_size,
+                'served_by': run_config.get('served_by', {}),
+                'floor': floor,
+                'calibration_command': calibration_command(run_config)
             }
         else:
             results[model_name] = {
@@ -124,9 +334,168 @@ def get_benchmark_results():
                 'exists': False,
                 'key': model_key
             }
+        
+        results[model_name]['slo_search'] = get_slo_search(model_key)
+        results[model_name]['providers'] = get_provider_comparison(model_key)
+        results[model_name]['input_sweep'] = get_input_sweep(model_key)
+        results[model_name]['prefix_cache'] = get_prefix_cache(model_key)
+        results[model_name]['decode'] = get_decode_breakdown(model_key)
+        results[model_name]['batch_sweep'] = get_batch_sweep(model_key)
     
     return results
 
+def get_live_stats():
+    """Collect the latest streaming statistics snapshot for each model
+
+    Snapshots are only re-read when their file changes, so frequent polling
+    (dashboard, /metrics scrapes) costs a stat() per model.
+    """
+    live_stats = {}
+    for live_path in sorted(Path("results").glob("*/live_stats.json")):
+        try:
+            mtime = live_path.stat().st_mtime_ns
+            cached = live_stats_cache.get(live_path)
+            if not cached or cached[0] != mtime:
+                with open(live_path, 'r') as f:
+                    cached = (mtime, json.load(f))
+                live_stats_cache[live_path] = cached
+            live_stats[live_path.parent.name] = cached[1]
+        except Exception as e:
+            # The benchmark replaces the file atomically, so this is a real error
+            print(f"Error reading live stats {live_path}: {e}")
+    return live_stats
+
+def is_live_snapshot(snapshot):
+    """True if a soak snapshot belongs to a run still in progress (not final, refreshed recently)"""
+    if snapshot.get('final'):
+        return False
+    try:
+        age_s = (datetime.now() - datetime.fromisoformat(snapshot['updated_at'])).total_seconds()
+    except (KeyError, TypeError, ValueError):
+        return False
+    window_s = snapshot.get('window_s') or 60
+    return age_s <= max(LIVE_STATS_STALE_WINDOWS * window_s, LIVE_STATS_MIN_STALE_S)
+
+def escape_label_value(value):
+    """Escape a Prometheus label value (backslash, double quote, newline)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_prometheus_family(name, help_text, samples):
+    """Render one gauge family in the Prometheus text format
+
+    samples is a list of (labels dict, value); None values are skipped.
+    """
+    samples = [(labels, value) for labels, value in samples if value is not None]
+    if not samples:
+        return []
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        label_text = ",".join(f'{key}="{escape_label_value(label)}"' for key, label in labels.items())
+        lines.append(f"{name}{{{label_text}}} {float(value)!r}")
+    return lines
+
+def results_signature():
+    """Modification times of every file the results metrics are built from"""
+    signature = []
+    for pattern in METRICS_SOURCE_FILES:
+        for path in Path("results").glob(f"*/{pattern}"):
+            try:
+                signature.append((str(path), path.stat().st_mtime_ns))
+            except FileNotFoundError:
+                # Deleted (e.g. by clean_old_results) between the glob and the stat
+                continue
+    return tuple(sorted(signature))
+
+def build_results_metrics():
+    """Render the latest per-model results as Prometheus gauges"""
+    families = {name: [] for name in RESULTS_METRIC_FAMILIES}
+    
+    for model_name, data in get_benchmark_results().items():
+        if not data['exists']:
+            continue
+        run_config = get_run_config(data['key'])
+        labels = {
+            'model': data['key'],
+            'run': run_config.get('timestamp', 'unknown'),
+            'concurrency': data.get('concurrency') or 'unknown'
+        }
+        metrics = data['metrics']
+        
+        for family, metric_names in LATENCY_METRIC_SOURCES.items():
+            stats = next((metrics[m] for m in metric_names if isinstance(metrics.get(m), dict)), {})
+            for stat, value in stats.items():
+                families[family].append(({**labels, 'stat': stat}, parse_metric_value(value)))
+        
+        families['llm_benchmark_output_token_throughput'].append(
+            (labels, parse_metric_value(metrics.get('Output Token Throughput (per sec)'))))
+        families['llm_benchmark_request_throughput'].append(
+            (labels, parse_metric_value(metrics.get('Request Throughput (per sec)'))))
+        if 'Items Throughput (per sec)' in metrics:
+            families['llm_benchmark_items_throughput'].append(
+                ({**labels, 'batch_size': data['batch_size']},
+                 parse_metric_value(metrics['Items Throughput (per sec)'])))
+        # Normal runs record counts in run_config.json; distributed and soak runs leave them null there
+        for family, count_key, metric_name in [('llm_benchmark_requests', 'request_count', 'Request Count'),
+                                               ('llm_benchmark_errors', 'error_count', 'Error Count')]:
+            count = run_config.get(count_key)
+            if count is None:
+                count = parse_metric_value(metrics.get(metric_name))
+            families[family].append((labels, count))
+        if 'timestamp' in run_config:
+            families['llm_benchmark_last_run_timestamp_seconds'].append(
+                (labels, datetime.fromisoformat(run_config['timestamp']).timestamp()))
+    
+    lines = []
+    for family, help_text in RESULTS_METRIC_FAMILIES.items():
+        lines += format_prometheus_family(family, help_text, families[family])
+    return "\n".join(lines)
+
+def get_results_metrics():
+    """Prometheus text for the latest results, rebuilt only when result files change"""
+    with metrics_lock:
+        signature = results_signature()
+        if signature != metrics_cache['signature']:
+            metrics_cache['text'] = build_results_metrics()
+            metrics_cache['signature'] = signature
+        return metrics_cache['text']
+
+def build_live_metrics():
+    """Render the active run's progress and streaming statistics as Prometheus gauges"""
+    status_labels = {
+        'run': benchmark_status.get('run_id') or 'none',
+        'model': benchmark_status.get('current_model') or 'none',
+        'concurrency': benchmark_status.get('concurrency') or 'unknown'
+    }
+    lines = []
+    lines += format_prometheus_family(
+        'llm_benchmark_running', 'Whether a benchmark started from the dashboard is running',
+        [(status_labels, 1 if benchmark_status['running'] else 0)])
+    lines += format_prometheus_family(
+        'llm_benchmark_progress_percent', 'Share of models finished in the dashboard-started benchmark',
+        [(status_labels, benchmark_status['progress'])])
+    
+    families = {name: [] for name in LIVE_METRIC_FAMILIES}
+    for model_key, snapshot in get_live_stats().items():
+        if not is_live_snapshot(snapshot):
+            continue
+        labels = {
+            'model': model_key,
+            'run': snapshot.get('started_at', 'unknown'),
+            'concurrency': snapshot.get('concurrency', 'unknown')
+        }
+        families['llm_benchmark_live_requests'].append((labels, snapshot.get('request_count')))
+        families['llm_benchmark_live_errors'].append((labels, snapshot.get('error_count')))
+        families['llm_benchmark_live_request_throughput'].append((labels, snapshot.get('request_throughput')))
+        families['llm_benchmark_live_output_token_throughput'].append((labels, snapshot.get('output_token_throughput')))
+        families['llm_benchmark_live_elapsed_seconds'].append((labels, snapshot.get('elapsed_s')))
+        for family, snapshot_key in LIVE_LATENCY_METRICS.items():
+            for stat, value in (snapshot.get(snapshot_key) or {}).items():
+                families[family].append(({**labels, 'stat': stat}, value))
+    
+    for family, help_text in LIVE_METRIC_FAMILIES.items():
+        lines += format_prometheus_family(family, help_text, families[family])
+    return "\n".join(lines)
+
 def get_ai_summary():
     """Read the AI-generated summary"""
     summary_path = Path("LLM_GENERATED_SUMMARY.md")
@@ -135,14 +504,16 @@ def get_ai_summary():
             return f.read()
     return None
 
-def run_benchmark_async():
+def run_benchmark_async(extra_args=None):
     """Run benchmark in background thread"""
     global benchmark_status
     
     # Reset status completely
     benchmark_status = {
+        'run_id': datetime.now().isoformat(),
         'running': True,
         'current_model': None,
+        'concurrency': None,
         'progress': 0,
         'logs': ['Starting benchmark...', '']
     }
@@ -160,7 +531,7 @@ def run_benchmark_async():
         env = os.environ.copy()
         # Force unbuffered Python output so we get real-time logs
         env['PYTHONUNBUFFERED'] = '1'
-        cmd = 'python -u benchmark.py'
+        cmd = shlex.join(['python', '-u', 'benchmark.py', *(extra_args or [])])
         
         benchmark_status['logs'].append('Running benchmark...')
         benchmark_status['logs'].append(f'Command: {cmd}')
@@ -184,6 +555,12 @@ def run_benchmark_async():
             if line:
                 benchmark_status['logs'].append(line)
                 print(line)  # Also print to console
+                match = MODEL_PROGRESS_LINE.match(line)
+                if match:
+                    index, total = int(match[1]), int(match[2])
+                    benchmark_status['current_model'] = match[3]
+                    benchmark_status['concurrency'] = int(match[4])
+                    benchmark_status['progress'] = round((index - 1) / total * 100)
         
         process.wait()
         
@@ -200,6 +577,7 @@ def run_benchmark_async():
     finally:
         benchmark_status['running'] = False
         benchmark_status['current_model'] = None
+        benchmark_status['concurrency'] = None
 
 @app.route('/')
 def index():
@@ -215,7 +593,7 @@ def index():
 @app.route('/api/chart-data')
 def chart_data():
     """API endpoint for chart data"""
-    results = get_benchmark_results()
+    results = get_benchmark_results(get_floor_mode())
     
     # Prepare throughput data
     throughput_labels = []
@@ -226,13 +604,11 @@ def chart_data():
     
     for model_name, data in results.items():
         if data['exists']:
-            # Throughput data
-            throughput_labels.append(model_name)
-            throughput = data['metrics'].get('Output Token Throughput (per sec)', '0')
-            try:
-                throughput_data.append(float(throughput))
-            except (ValueError, TypeError):
-                throughput_data.append(0)
+            # Throughput data; embeddings have no tokens/s, so they are left out rather than shown as 0
+            throughput = parse_metric_value(data['metrics'].get('Output Token Throughput (per sec)'))
+            if throughput is not None:
+                throughput_labels.append(model_name)
+                throughput_data.append(throughput)
             
             # Latency data
             if 'Request Latency (ms)' in data['metrics']:
@@ -270,10 +646,15 @@ def chart_data():
         }
     })
 
+@app.route('/api/calibration')
+def api_calibration():
+    """API endpoint for the harness floor per concurrency level"""
+    return jsonify(get_calibration_floor())
+
 @app.route('/api/results')
 def api_results():
     """API endpoint for results data"""
-    return jsonify(get_benchmark_results())
+    return jsonify(get_benchmark_results(get_floor_mode()))
 
 @app.route('/api/benchmark/start', methods=['POST'])
 def start_benchmark():
@@ -283,8 +664,17 @@ def start_benchmark():
     if benchmark_status['running']:
         return jsonify({'error': 'Benchmark already running'}), 400
     
+    # Optional soak test: {"soak_minutes": 120} publishes live statistics while running
+    options = request.get_json(silent=True) or {}
+    extra_args = []
+    if options.get('soak_minutes'):
+        try:
+            extra_args = ['--soak-minutes', str(float(options['soak_minutes']))]
+        except (ValueError, TypeError):
+            return jsonify({'error': 'soak_minutes must be a number'}), 400
+    
     # Start benchmark in background thread
-    thread = threading.Thread(target=run_benchmark_async)
+    thread = threading.Thread(target=run_benchmark_async, args=(extra_args,))
     thread.start()
     
     return jsonify({'status': 'started'})
@@ -294,6 +684,18 @@ def benchmark_status_api():
     """Get current benchmark status"""
     return jsonify(benchmark_status)
 
+@app.route('/api/benchmark/live')
+def benchmark_live_api():
+    """Get live streaming statistics published during soak runs, flagging those of runs in progress"""
+    return jsonify({key: {**snapshot, 'live': is_live_snapshot(snapshot)}
+                    for key, snapshot in get_live_stats().items()})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus/OpenMetrics scrape endpoint for latest and live benchmark metrics"""
+    text = "\n".join(part for part in [get_results_metrics(), build_live_metrics()] if part)
+    return Response(text + "\n", mimetype='text/plain; version=0.0.4')
+
 @app.route('/summary')
 def summary():
     """View AI-generated summary"""
@@ -303,13 +705,15 @@ def summary():
 @app.route('/comparison')
 def comparison():
     """Side-by-side comparison view"""
-    results = get_benchmark_results()
-    return render_template('comparison.html', results=results)
+    floor_mode = get_floor_mode()
+    results = get_benchmark_results(floor_mode)
+    return render_template('comparison.html', results=results, floor_mode=floor_mode)
 
 @app.route('/model/<model_key>')
 def model_detail(model_key):
     """Detailed view for a specific model"""
-    results = get_benchmark_results()
+    floor_mode = get_floor_mode()
+    results = get_benchmark_results(floor_mode)
     
     # Find model by key
     model_data = None
@@ -325,7 +729,8 @@ def model_detail(model_key):
     
     return render_template('model_detail.html', 
                          model_name=model_name, 
-                         model_data=model_data)
+                         model_data=model_data,
+                         floor_mode=floor_mode)
 
 if __name__ == '__main__':
     print("="*60)